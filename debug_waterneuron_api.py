@@ -6,10 +6,86 @@ Try to find API calls that the dashboard makes to get exchange rate data
 
 import asyncio
 import aiohttp
-import json
 import re
 
-async def test_waterneuron_apis():
+# orjson parses response bodies straight from bytes and much faster than the stdlib
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# URL patterns used to spot network calls in the dashboard source, compiled once
+URL_PATTERNS = [
+    re.compile(r'https?://[^\s\'"]+'),
+    re.compile(r'[\'"`]/api/[^\s\'"]+'),
+    re.compile(r'[\'"`]/[a-zA-Z]+/[^\s\'"]+'),
+    re.compile(r'fetch\([\'"`]([^\'"`]+)[\'"`]\)'),
+    re.compile(r'axios\.[get|post]+\([\'"`]([^\'"`]+)[\'"`]\)')
+]
+
+# Hyperscan matches all URL patterns in a single pass when it is installed
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+_url_database = None
+
+def _get_url_database():
+    """Compile the URL patterns into a Hyperscan database on first use"""
+    global _url_database
+    if _url_database is None:
+        _url_database = hyperscan.Database()
+        _url_database.compile(
+            expressions=[pattern.pattern.encode() for pattern in URL_PATTERNS],
+            ids=list(range(len(URL_PATTERNS))),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(URL_PATTERNS)
+        )
+    return _url_database
+
+def find_url_candidates(html_content: str):
+    """Yield every URL pattern match in the page, like running findall for each pattern"""
+    if hyperscan is None:
+        for pattern in URL_PATTERNS:
+            yield from pattern.findall(html_content)
+        return
+    
+    # Hyperscan reports every end offset, keep the longest (greedy) match per start
+    raw = html_content.encode('utf-8')
+    spans = {}
+    
+    def on_match(pattern_id, start, end, flags, context):
+        key = (pattern_id, start)
+        if end > spans.get(key, -1):
+            spans[key] = end
+    
+    _get_url_database().scan(raw, match_event_handler=on_match)
+    
+    # Drop overlapping hits per pattern, then pull out capture groups with the compiled regex
+    last_end = {}
+    for (pattern_id, start), end in sorted(spans.items()):
+        if start < last_end.get(pattern_id, 0):
+            continue
+        last_end[pattern_id] = end
+        match = URL_PATTERNS[pattern_id].match(raw[start:end].decode('utf-8', 'ignore'))
+        if match:
+            yield match.group(1) if match.groups() else match.group(0)
+
+DASHBOARD_URL = "https://wtn.ic.app/?tab=nicp"
+
+def build_session() -> aiohttp.ClientSession:
+    """Create the HTTP session shared by all probes (keeps connections and DNS cached)"""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=600, use_dns_cache=True),
+        timeout=aiohttp.ClientTimeout(total=10),
+        headers={
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
+    )
+
+async def test_waterneuron_apis(session: aiohttp.ClientSession):
     """Test various potential API endpoints for WaterNeuron data"""
     
     # Potential API endpoints based on common patterns
@@ -38,130 +114,156 @@ async def test_waterneuron_apis():
         "https://tsbvt-pyaaa-aaaar-qafva-cai.raw.ic0.app/nicp_stats"
     ]
     
-    async with aiohttp.ClientSession(
-        timeout=aiohttp.ClientTimeout(total=10),
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-    ) as session:
-        
-        print("🔍 Testing potential API endpoints...")
+    async def probe(url):
+        async with session.get(url) as response:
+            body = await response.read() if response.status == 200 else b''
+            content = await response.text() if body else ''  # Decodes the already-read body
+            return url, response.status, response.headers.get('content-type', ''), body, content
+    
+    async def host_alive(base_url):
+        try:
+            async with session.head(base_url, allow_redirects=True) as response:
+                return response.status < 500
+        except Exception:
+            return False
+    
+    # Cheap HEAD preflight per host so dead hosts don't get a GET for every endpoint
+    alive = await asyncio.gather(*(host_alive(base_url) for base_url in base_urls))
+    for base_url, ok in zip(base_urls, alive):
+        if not ok:
+            print(f"⏭️  {base_url} - Host unreachable, skipping {len(endpoints)} endpoints")
+    base_urls = [base_url for base_url, ok in zip(base_urls, alive) if ok]
+    
+    # Fire all GET probes concurrently, the connector limit caps parallelism
+    api_urls = [base_url + endpoint for base_url in base_urls for endpoint in endpoints]
+    results = await asyncio.gather(
+        *(probe(url) for url in api_urls + canister_endpoints),
+        return_exceptions=True
+    )
+    api_results = results[:len(api_urls)]
+    canister_results = results[len(api_urls):]
+    
+    print("🔍 Testing potential API endpoints...")
+    
+    # Test regular API endpoints
+    for url, result in zip(api_urls, api_results):
+        if isinstance(result, Exception):
+            print(f"❌ {url} - Error: {str(result)[:50]}...")
+            continue
         
-        # Test regular API endpoints
-        for base_url in base_urls:
-            for endpoint in endpoints:
-                url = base_url + endpoint
+        url, status, content_type, body, content = result
+        if status == 200:
+            print(f"✅ {url} - Status: {status}")
+            print(f"   Content-Type: {content_type}")
+            print(f"   Content length: {len(content)}")
+            
+            # If it's JSON, try to parse it
+            if 'json' in content_type:
                 try:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            content_type = response.headers.get('content-type', '')
-                            content = await response.text()
-                            
-                            print(f"✅ {url} - Status: {response.status}")
-                            print(f"   Content-Type: {content_type}")
-                            print(f"   Content length: {len(content)}")
-                            
-                            # If it's JSON, try to parse it
-                            if 'json' in content_type:
-                                try:
-                                    data = json.loads(content)
-                                    print(f"   JSON keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-                                    
-                                    # Look for exchange rate related fields
-                                    if isinstance(data, dict):
-                                        rate_fields = [k for k in data.keys() if 'rate' in k.lower() or 'exchange' in k.lower()]
-                                        if rate_fields:
-                                            print(f"   🎯 Rate fields found: {rate_fields}")
-                                            for field in rate_fields:
-                                                print(f"      {field}: {data[field]}")
-                                except json.JSONDecodeError:
-                                    pass
-                            else:
-                                # Show first 200 chars of text content
-                                print(f"   Content preview: {content[:200]}...")
-                            
-                            print()
-                        else:
-                            print(f"❌ {url} - Status: {response.status}")
-                            
-                except Exception as e:
-                    print(f"❌ {url} - Error: {str(e)[:50]}...")
-        
-        print("\n🔍 Testing canister endpoints...")
-        
-        # Test canister endpoints
-        for url in canister_endpoints:
-            try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        content_type = response.headers.get('content-type', '')
-                        content = await response.text()
-                        
-                        print(f"✅ {url} - Status: {response.status}")
-                        print(f"   Content-Type: {content_type}")
-                        print(f"   Content: {content[:300]}...")
-                        print()
-                    else:
-                        print(f"❌ {url} - Status: {response.status}")
-                        
-            except Exception as e:
-                print(f"❌ {url} - Error: {str(e)[:50]}...")
-        
-        print("\n🔍 Testing with different HTTP methods...")
-        
-        # Try POST requests to common endpoints
-        post_endpoints = [
-            "https://wtn.ic.app/api/query",
-            "https://tsbvt-pyaaa-aaaar-qafva-cai.raw.ic0.app/query"
-        ]
+                    data = json_loads(body)
+                    print(f"   JSON keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
+                    
+                    # Look for exchange rate related fields
+                    if isinstance(data, dict):
+                        rate_fields = [k for k in data.keys() if 'rate' in k.lower() or 'exchange' in k.lower()]
+                        if rate_fields:
+                            print(f"   🎯 Rate fields found: {rate_fields}")
+                            for field in rate_fields:
+                                print(f"      {field}: {data[field]}")
+                # orjson.JSONDecodeError and UnicodeDecodeError are both ValueErrors
+                except ValueError:
+                    pass
+            else:
+                # Show first 200 chars of text content
+                print(f"   Content preview: {content[:200]}...")
+            
+            print()
+        else:
+            print(f"❌ {url} - Status: {status}")
+    
+    print("\n🔍 Testing canister endpoints...")
+    
+    # Test canister endpoints
+    for url, result in zip(canister_endpoints, canister_results):
+        if isinstance(result, Exception):
+            print(f"❌ {url} - Error: {str(result)[:50]}...")
+            continue
         
-        for url in post_endpoints:
-            try:
-                # Try empty POST
-                async with session.post(url, json={}) as response:
-                    if response.status < 500:  # Any response that's not server error
-                        content = await response.text()
-                        print(f"✅ POST {url} - Status: {response.status}")
-                        print(f"   Content: {content[:200]}...")
-                        print()
-                        
-            except Exception as e:
-                print(f"❌ POST {url} - Error: {str(e)[:50]}...")
+        url, status, content_type, body, content = result
+        if status == 200:
+            print(f"✅ {url} - Status: {status}")
+            print(f"   Content-Type: {content_type}")
+            print(f"   Content: {content[:300]}...")
+            print()
+        else:
+            print(f"❌ {url} - Status: {status}")
+    
+    print("\n🔍 Testing with different HTTP methods...")
+    
+    # Try POST requests to common endpoints
+    post_endpoints = [
+        "https://wtn.ic.app/api/query",
+        "https://tsbvt-pyaaa-aaaar-qafva-cai.raw.ic0.app/query"
+    ]
+    
+    for url in post_endpoints:
+        try:
+            # Try empty POST
+            async with session.post(url, json={}) as response:
+                if response.status < 500:  # Any response that's not server error
+                    content = await response.text()
+                    print(f"✅ POST {url} - Status: {response.status}")
+                    print(f"   Content: {content[:200]}...")
+                    print()
+                    
+        except Exception as e:
+            print(f"❌ POST {url} - Error: {str(e)[:50]}...")
+
+async def fetch_dashboard_html(session: aiohttp.ClientSession) -> str:
+    """Fetch the nICP dashboard page once so every analysis can reuse it"""
+    async with session.get(DASHBOARD_URL) as response:
+        return await response.text()
 
-async def analyze_page_network_calls():
+async def analyze_page_network_calls(session: aiohttp.ClientSession, html_content: str = None):
     """Analyze the page source to find what network calls it might make"""
     
     print("\n🔍 Analyzing page source for network calls...")
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://wtn.ic.app/?tab=nicp") as response:
-            html_content = await response.text()
-            
-            # Look for URLs in the JavaScript
-            url_patterns = [
-                r'https?://[^\s\'"]+',
-                r'[\'"`]/api/[^\s\'"]+',
-                r'[\'"`]/[a-zA-Z]+/[^\s\'"]+',
-                r'fetch\([\'"`]([^\'"`]+)[\'"`]\)',
-                r'axios\.[get|post]+\([\'"`]([^\'"`]+)[\'"`]\)'
-            ]
-            
-            found_urls = set()
-            
-            for pattern in url_patterns:
-                matches = re.findall(pattern, html_content)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]
-                    if len(match) > 5 and not match.endswith('.js') and not match.endswith('.css'):
-                        found_urls.add(match)
-            
-            print(f"Found potential API URLs:")
-            for url in sorted(found_urls):
-                print(f"  {url}")
+    if html_content is None:
+        html_content = await fetch_dashboard_html(session)
+    
+    found_urls = set()
+    
+    # Look for URLs in the JavaScript
+    for match in find_url_candidates(html_content):
+        if isinstance(match, tuple):
+            match = match[0]
+        if len(match) > 5 and not match.endswith('.js') and not match.endswith('.css'):
+            found_urls.add(match)
+    
+    print(f"Found potential API URLs:")
+    for url in sorted(found_urls):
+        print(f"  {url}")
+
+async def main():
+    """Run all probes over a single shared session"""
+    async with build_session() as session:
+        # Dashboard HTML is fetched once per run and handed to the page analysis; if it
+        # fails the API probes still run and the analysis retries the fetch itself
+        try:
+            html_content = await fetch_dashboard_html(session)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Could not fetch dashboard page: {e}")
+            html_content = None
+        await test_waterneuron_apis(session)
+        await analyze_page_network_calls(session, html_content)
 
 if __name__ == "__main__":
-    asyncio.run(test_waterneuron_apis())
-    asyncio.run(analyze_page_network_calls()) 
\ No newline at end of file
+    # Use the faster libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    asyncio.run(main()) 
\ No newline at end of file
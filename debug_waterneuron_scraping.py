@@ -7,9 +7,50 @@ Test script to examine what content we can extract from the WaterNeuron dashboar
 import asyncio
 import aiohttp
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 
+# Prefer the C-backed lxml parser, fall back to the stdlib parser if unavailable
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Only the body text and script tags are inspected, skip building the rest of the DOM
+PARSE_ONLY = SoupStrainer(['script', 'body'])
+
+# Exchange rate patterns, compiled once
+NICP_ICP_PATTERN = re.compile(r'nICP/ICP\s*[=:]\s*([\d.]+)', re.IGNORECASE)
+ICP_NICP_PATTERN = re.compile(r'ICP/nICP\s*[=:]\s*([\d.]+)', re.IGNORECASE)
+EXCHANGE_RATE_PATTERN = re.compile(r'Exchange\s+Rate[:\s]+(.*?)(?:\n|$)', re.IGNORECASE | re.DOTALL)
+
+# Single pass over the text for every candidate range, hits are bucketed by prefix
+RATE_PATTERN = re.compile(r'(?:0\.[89]|1\.[01])\d{3,4}')
+RATE_RANGES = [
+    ('0.9', r'0\.9\d{3,4}'),  # Like 0.9001
+    ('1.1', r'1\.1\d{3,4}'),  # Like 1.1110
+    ('0.8', r'0\.8\d{3,4}'),  # Alternative range
+    ('1.0', r'1\.0\d{3,4}')   # Alternative range
+]
+
+NUMBER_PATTERN = re.compile(r'[\d.]+')
+RATE_LITERAL_PATTERN = re.compile(r'[01]\.\d{4}')
+
+def search_near_anchor(pattern, text, lowered, anchor, window=400):
+    """Run pattern only where the literal anchor occurs instead of over the whole text
+
+    lowered is the text as ASCII-lowercased bytes with the same length as text,
+    so a cheap bytes.find() locates candidate positions for the regex.
+    """
+    index = lowered.find(anchor)
+    while index >= 0:
+        match = pattern.match(text, index, index + window)
+        if match:
+            return match
+        index = lowered.find(anchor, index + 1)
+    return None
+
 async def debug_waterneuron_scraping():
     """Debug the WaterNeuron scraping process"""
     
@@ -30,8 +71,8 @@ async def debug_waterneuron_scraping():
             html_content = await response.text()
             print(f"Content length: {len(html_content)} characters")
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Parse with BeautifulSoup (body + scripts only)
+            soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=PARSE_ONLY)
             
             # Get all text content
             text_content = soup.get_text()
@@ -46,25 +87,25 @@ async def debug_waterneuron_scraping():
             # Look for specific patterns we expect
             print(f"\n🔍 Searching for exchange rate patterns...")
             
+            # One byte per character, so offsets line up with text_content
+            lowered = text_content.encode('ascii', 'replace').lower()
+            
             # Pattern 1: nICP/ICP = 0.9001
-            pattern1 = r'nICP/ICP\s*[=:]\s*([\d.]+)'
-            match1 = re.search(pattern1, text_content, re.IGNORECASE)
+            match1 = search_near_anchor(NICP_ICP_PATTERN, text_content, lowered, b'nicp/icp')
             if match1:
                 print(f"✅ Found nICP/ICP pattern: {match1.group(1)}")
             else:
                 print("❌ nICP/ICP pattern not found")
             
             # Pattern 2: ICP/nICP = 1.1110
-            pattern2 = r'ICP/nICP\s*[=:]\s*([\d.]+)'
-            match2 = re.search(pattern2, text_content, re.IGNORECASE)
+            match2 = search_near_anchor(ICP_NICP_PATTERN, text_content, lowered, b'icp/nicp')
             if match2:
                 print(f"✅ Found ICP/nICP pattern: {match2.group(1)}")
             else:
                 print("❌ ICP/nICP pattern not found")
             
             # Pattern 3: Exchange Rate:
-            pattern3 = r'Exchange\s+Rate[:\s]+(.*?)(?:\n|$)'
-            match3 = re.search(pattern3, text_content, re.IGNORECASE | re.DOTALL)
+            match3 = search_near_anchor(EXCHANGE_RATE_PATTERN, text_content, lowered, b'exchange')
             if match3:
                 print(f"✅ Found Exchange Rate section: {match3.group(1)[:100]}...")
             else:
@@ -72,15 +113,12 @@ async def debug_waterneuron_scraping():
             
             # Look for numbers that could be exchange rates
             print(f"\n🔢 Looking for potential exchange rate numbers...")
-            number_patterns = [
-                r'0\.9\d{3,4}',  # Like 0.9001
-                r'1\.1\d{3,4}',  # Like 1.1110
-                r'0\.8\d{3,4}',  # Alternative range
-                r'1\.0\d{3,4}'   # Alternative range
-            ]
+            rate_hits = {prefix: [] for prefix, _ in RATE_RANGES}
+            for match in RATE_PATTERN.findall(text_content):
+                rate_hits[match[:3]].append(match)
             
-            for i, pattern in enumerate(number_patterns, 1):
-                matches = re.findall(pattern, text_content)
+            for i, (prefix, pattern) in enumerate(RATE_RANGES, 1):
+                matches = rate_hits[prefix]
                 if matches:
                     print(f"✅ Pattern {i} ({pattern}) found: {matches}")
                 else:
@@ -97,8 +135,8 @@ async def debug_waterneuron_scraping():
                     print(script.string[:200] + "...")
                     
                     # Look for exchange rate in script
-                    script_matches = re.findall(r'[\d.]+', script.string)
-                    potential_rates = [float(m) for m in script_matches if re.match(r'^[01]\.\d{4}$', m)]
+                    script_matches = NUMBER_PATTERN.findall(script.string)
+                    potential_rates = [float(m) for m in script_matches if RATE_LITERAL_PATTERN.fullmatch(m)]
                     if potential_rates:
                         print(f"Potential exchange rates in script: {potential_rates}")
             
@@ -114,4 +152,11 @@ async def debug_waterneuron_scraping():
                     print(f"🔍 Found SPA indicator: {indicator}")
 
 if __name__ == "__main__":
+    # Use the faster libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(debug_waterneuron_scraping()) 
\ No newline at end of file
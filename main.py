@@ -6,157 +6,190 @@ Tracks nICP/ICP discount opportunities across DEXes
 
 import asyncio
 import logging
+import logging.handlers
 import os
+import queue
+import re
 import sys
 import signal
-import time
-from datetime import datetime
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+
+# KEY=value lines from config.env; comments and blank lines never match
+CONFIG_LINE_PATTERN = re.compile(r'^[ \t]*([^#=\s][^=\n]*?)[ \t]*=[ \t]*["\']?(.*?)["\']?[ \t]*\r?$', re.MULTILINE)
 
 # Load environment variables from config file
 def load_config():
     """Load environment variables from config/config.env file"""
     config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.env')
-    if os.path.exists(config_path):
+    try:
         with open(config_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    # Remove quotes if present
-                    value = value.strip().strip('"').strip("'")
-                    os.environ[key.strip()] = value
-        print(f"✅ Loaded configuration from {config_path}")
-    else:
+            os.environ.update(CONFIG_LINE_PATTERN.findall(f.read()))
+    except FileNotFoundError:
         print(f"⚠️  Config file not found: {config_path}")
+        return
+    print(f"✅ Loaded configuration from {config_path}")
 
 # Load config before importing other modules
 load_config()
 
-# Add src to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
 from src.core.nicp_arbitrage_client import NICPArbitrageClient
 from src.core.database import Database
-from src.bot.telegram_bot import TelegramBot
 
-# Configure logging
+# Configure logging: callers only enqueue records, a background thread writes them out
+os.makedirs('logs', exist_ok=True)
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.FileHandler('logs/nicp_arbitrage_bot.log', delay=True),  # Opened on the first record
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/nicp_arbitrage_bot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 
 logger = logging.getLogger(__name__)
 
 class NICPArbitrageBot:
+    __slots__ = (
+        'telegram_token', 'database', 'arbitrage_client', 'telegram_bot',
+        '_tasks', 'running', '_loop', '_stop_event'
+    )
+    
+    # Upper bound for one arbitrage fetch, kept below the 30s update interval
+    FETCH_TIMEOUT = 25
+    
+    # Health symbols indexed by the boolean status (False -> 0, True -> 1)
+    _STATUS_SYMBOLS = ("❌", "✅")
+    
     def __init__(self):
         # Load environment variables
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         if not self.telegram_token:
             raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
         
+        # The telegram stack is the heaviest import, only load it once the bot is built
+        from src.bot.telegram_bot import TelegramBot
+        
         # Initialize components
         self.database = Database()
         self.arbitrage_client = NICPArbitrageClient()
-        self.telegram_bot = TelegramBot(self.telegram_token, self.database)
+        self.telegram_bot = TelegramBot(self.telegram_token, self.database, self.arbitrage_client)
         
-        # Scheduler for periodic tasks
-        self.scheduler = AsyncIOScheduler()
+        # Periodic background tasks
+        self._tasks = []
         self.running = False
         
-        # Setup signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # Created in start() once the event loop is running
+        self._loop = None
+        self._stop_event = None
 
-    def _signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
-        logger.info(f"Received signal {signum}, shutting down...")
+    def _signal_handler(self, signum):
+        """Handle shutdown signals (runs on the event loop)"""
+        logger.info("Received signal %s, shutting down...", signum)
         self.running = False
+        self._stop_event.set()
 
     async def update_arbitrage_data(self):
         """Periodic task to update nICP arbitrage data"""
         try:
             logger.info("🔍 Updating nICP arbitrage data...")
             
-            # Get arbitrage data
-            arbitrage_data = await self.arbitrage_client.get_nicp_arbitrage_data()
+            # Get arbitrage data, bounded so a slow DEX can't stall the next tick
+            arbitrage_data = await asyncio.wait_for(
+                self.arbitrage_client.get_nicp_arbitrage_data(),
+                timeout=self.FETCH_TIMEOUT
+            )
             
             # Store in database (simplified for now)
-            timestamp = datetime.now()
             opportunities = len(arbitrage_data.get('opportunities', []))
             viable_opportunities = arbitrage_data['summary']['viable_opportunities']
             best_profit = arbitrage_data['summary']['best_profit_6m']
             
-            logger.info(f"📊 Found {opportunities} opportunities, {viable_opportunities} viable, best: {best_profit:.1f}%")
+            logger.info("📊 Found %d opportunities, %d viable, best: %.1f%%", opportunities, viable_opportunities, best_profit)
             
             # TODO: Store detailed data in database for historical tracking
+            # (stamp rows with time.time_ns() and format timestamps on read)
             # self.database.store_arbitrage_data(arbitrage_data)
             
+        except asyncio.TimeoutError:
+            logger.error("Arbitrage data fetch timed out after %ss", self.FETCH_TIMEOUT)
         except Exception as e:
-            logger.error(f"Error updating arbitrage data: {e}")
+            logger.error("Error updating arbitrage data: %s", e)
+
+    async def _periodic(self, interval: float, coro_fn):
+        """Run coro_fn every interval seconds until the bot stops"""
+        await asyncio.sleep(interval)
+        while not self._stop_event.is_set():
+            # Sleep alongside the run so ticks stay interval apart regardless of run time
+            await asyncio.gather(coro_fn(), asyncio.sleep(interval))
 
     async def check_api_health(self):
-        """Check health of DEX APIs"""
+        """Report DEX API health from the last arbitrage fetch (no extra requests)"""
         try:
-            health = self.arbitrage_client.check_health()
-            status_symbols = {True: "✅", False: "❌"}
+            health = self.arbitrage_client.last_health
+            if not health:
+                logger.warning("Health check - no DEX fetch has completed yet")
+                return
             
-            health_status = ", ".join([
-                f"{dex}: {status_symbols[status]}" 
+            health_status = ", ".join(
+                f"{dex}: {self._STATUS_SYMBOLS[status]}"
                 for dex, status in health.items()
-            ])
+            )
             
-            logger.info(f"Health check - {health_status}")
+            logger.info("Health check - %s", health_status)
             
         except Exception as e:
-            logger.error(f"Health check failed: {e}")
+            logger.error("Health check failed: %s", e)
 
     async def start(self):
         """Start the nICP arbitrage bot"""
         logger.info("🚀 Starting nICP Discount Tracker...")
         
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        
+        # Setup signal handlers for graceful shutdown, delivered through the loop's wakeup fd
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self._loop.add_signal_handler(signum, self._signal_handler, signum)
+        
+        # Let tasks that finish without suspending skip the scheduling round-trip (Python 3.12+)
+        if hasattr(asyncio, 'eager_task_factory'):
+            self._loop.set_task_factory(asyncio.eager_task_factory)
+        
+        # Open the arbitrage client's HTTP session (must happen inside the running loop)
+        await self.arbitrage_client.__aenter__()
+        
         # Initialize database (already done in constructor)
         # self.database.init_database()  # Already called in __init__
         
-        # Start scheduler
-        logger.info("Starting scheduler...")
-        self.scheduler.add_job(
-            self.update_arbitrage_data,
-            IntervalTrigger(seconds=30),  # Update every 30 seconds
-            id='update_arbitrage_data',
-            replace_existing=True
-        )
-        
-        self.scheduler.add_job(
-            self.check_api_health,
-            IntervalTrigger(minutes=5),  # Health check every 5 minutes
-            id='health_check',
-            replace_existing=True
-        )
-        
-        self.scheduler.start()
-        logger.info("Scheduler started")
-        
         # Run initial data fetch
         logger.info("Running initial arbitrage data fetch...")
         await self.update_arbitrage_data()
         
-        # Start Telegram bot
-        logger.info("Starting Telegram bot...")
+        # Start periodic tasks
+        logger.info("Starting periodic tasks...")
         self.running = True
-        
-        # Start bot in background task
-        bot_task = asyncio.create_task(self.telegram_bot.start_bot())
+        self._tasks = [
+            asyncio.create_task(self._periodic(30, self.update_arbitrage_data)),  # Update every 30 seconds
+            asyncio.create_task(self._periodic(300, self.check_api_health))  # Health check every 5 minutes
+        ]
+        logger.info("Periodic tasks started")
         
         try:
-            # Keep the main loop running
-            while self.running:
-                await asyncio.sleep(1)
+            # Start Telegram bot (polls on this same event loop); a failure here still
+            # runs shutdown so the periodic tasks and HTTP session are not leaked
+            logger.info("Starting Telegram bot...")
+            await self.telegram_bot.start_bot()
+            
+            # Sleep until a shutdown signal sets the stop event; like a TaskGroup, a
+            # periodic task dying also brings the bot down instead of going silent
+            stop_waiter = asyncio.create_task(self._stop_event.wait())
+            done, _ = await asyncio.wait([stop_waiter, *self._tasks], return_when=asyncio.FIRST_COMPLETED)
+            stop_waiter.cancel()
+            for task in done:
+                if task is not stop_waiter and not task.cancelled() and task.exception():
+                    logger.error("Periodic task failed: %s", task.exception())
                 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt")
@@ -167,26 +200,36 @@ class NICPArbitrageBot:
         """Graceful shutdown"""
         logger.info("�� Shutting down nICP Discount Tracker...")
         
-        # Stop scheduler
-        if self.scheduler.running:
-            self.scheduler.shutdown()
-            logger.info("Scheduler stopped")
+        # Stop periodic tasks
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Periodic tasks stopped")
         
-        # Stop Telegram bot
+        # Stop Telegram bot first so no handler is still using the database when it closes
         try:
             await self.telegram_bot.stop_bot()
             logger.info("Telegram bot stopped")
         except Exception as e:
-            logger.error(f"Error stopping Telegram bot: {e}")
+            logger.error("Error stopping Telegram bot: %s", e)
         
-        # Close database connection
-        self.database.close()
+        # Checkpoint and close the database off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.database.close)
         logger.info("Database connection closed")
         
+        # Close HTTP session
+        await self.arbitrage_client.__aexit__(None, None, None)
+        logger.info("HTTP session closed")
+        
         logger.info("✅ Shutdown complete")
 
 async def main():
     """Main entry point"""
+    # File and console writes happen on the listener's thread, not the event loop
+    log_listener.start()
+    
     try:
         # Create and start the bot
         bot = NICPArbitrageBot()
@@ -195,13 +238,13 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         sys.exit(1)
+    finally:
+        # Flush queued log records before exiting
+        log_listener.stop()
 
 if __name__ == "__main__":
-    # Ensure logs directory exists
-    os.makedirs('logs', exist_ok=True)
-    
     # Check for required environment variables
     if not os.getenv('TELEGRAM_BOT_TOKEN'):
         print("❌ Error: TELEGRAM_BOT_TOKEN environment variable is required")
@@ -215,5 +258,12 @@ if __name__ == "__main__":
     print("🤖 Telegram bot ready for user commands")
     print("========================================")
     
+    # Use the faster libuv-based event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run the bot
     asyncio.run(main()) 
\ No newline at end of file
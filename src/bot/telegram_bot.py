@@ -1,38 +1,47 @@
 import logging
 import asyncio
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-from telegram.constants import ParseMode
-import json
-from datetime import datetime
+import bisect
 import os
-import sys
-from typing import List
-
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import time
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from telegram.ext import AIORateLimiter, Application, CommandHandler, CallbackQueryHandler, ContextTypes, Defaults
+from telegram.constants import ChatAction, ParseMode
+from telegram.helpers import escape_markdown
+import json
+from typing import Dict, List, Optional, Set
 
 from src.core.nicp_arbitrage_client import NICPArbitrageClient
 from src.core.database import Database
 
 logger = logging.getLogger(__name__)
 
-class TelegramBot:
-    def __init__(self, token: str, database: Database):
-        self.token = token
-        self.database = database
-        self.arbitrage_client = NICPArbitrageClient()
-        self.application = None
-        
-    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /start command with nICP discount focus"""
-        user_id = update.effective_user.id
-        username = update.effective_user.username or "Unknown"
-        
-        # Store user in database
-        self.database.add_user(user_id, username)
-        
-        welcome_text = f"""
+# Telegram's maximum message length, measured in UTF-16 code units
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def _utf16_len(text: str) -> int:
+    """Length of text as Telegram counts it"""
+    return len(text.encode('utf-16-le')) // 2
+
+def _fits_in_message(text: str) -> bool:
+    """Whether text fits in one Telegram message, encoding it only when it's borderline"""
+    # Every character is one or two UTF-16 code units, so len() bounds the count both ways
+    length = len(text)
+    if length * 2 <= TELEGRAM_MESSAGE_LIMIT:
+        return True
+    if length > TELEGRAM_MESSAGE_LIMIT:
+        return False
+    return _utf16_len(text) <= TELEGRAM_MESSAGE_LIMIT
+
+# Profit thresholds (% over 6 months) and the emoji for each band between them
+PROFIT_TIERS = (10, 15, 20)
+PROFIT_TIER_EMOJIS = ("💡", "✅", "🔥", "🚀")
+
+# Bound number formatters for the per-opportunity lines of the discount message
+_F1 = "{:.1f}".format
+_F6 = "{:.6f}".format
+
+# Static replies and keyboards, built once at import and shared by every request
+WELCOME_TEXT = """
 🚀 **Welcome to nICP Discount Tracker!**
 
 💰 **What is nICP?**
@@ -51,214 +60,8 @@ nICP is staked ICP that unlocks after 6 months. When nICP trades below ICP price
 
 Ready to find nICP discounts? Try `/discount` to see live data! 🚀
 """
-        
-        keyboard = [
-            [InlineKeyboardButton("🎯 Check Discounts", callback_data="discount")],
-            [InlineKeyboardButton("📚 Learn More", callback_data="explain")],
-            [InlineKeyboardButton("🧮 Calculator", callback_data="calculator")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            welcome_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
-        )
-
-    async def show_discount_opportunities(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Show current nICP discount opportunities with clear comparison"""
-        try:
-            logger.info("💰 User requested discount opportunities")
-            
-            # Send initial "fetching" message
-            loading_msg = await update.message.reply_text(
-                "🔍 **Analyzing nICP discount opportunities...**\n"
-                "📊 Checking live prices across DEXes\n"
-                "🌊 Fetching WaterNeuron exchange rates\n"
-                "⏳ Please wait a moment...",
-                parse_mode='Markdown'
-            )
-            
-            # Get arbitrage data
-            arbitrage_data = await self.arbitrage_client.get_nicp_arbitrage_data()
-            
-            if not arbitrage_data or not arbitrage_data.get('opportunities'):
-                await loading_msg.edit_text(
-                    "❌ **No Data Available**\n\n"
-                    "Could not fetch nICP price data from DEXes.\n"
-                    "Please try again in a few minutes.\n\n"
-                    "💡 Use /status to check API health.",
-                    parse_mode='Markdown'
-                )
-                return
-            
-            # Build comprehensive message
-            message_parts = []
-            
-            # Header with WaterNeuron status
-            waterneuron_data = arbitrage_data.get('waterneuron_data')
-            if waterneuron_data and waterneuron_data.get('success'):
-                wn_status = "✅ Live WaterNeuron data"
-                exchange_rate = waterneuron_data.get('nicp_to_icp_rate', 0.9001)
-            else:
-                wn_status = "⚠️ Using fallback rates"
-                exchange_rate = 0.9001
-            
-            message_parts.append(f"🎯 **nICP Discount Opportunities**")
-            message_parts.append(f"🌊 {wn_status}")
-            message_parts.append(f"📅 Current exchange rate: 1 ICP = {exchange_rate:.4f} nICP")
-            message_parts.append("")
-            
-            # Show direct staking option first for comparison
-            message_parts.append("🏛️ **Direct WaterNeuron Staking**")
-            message_parts.append(f"• Exchange: 1,000 ICP → {1000 * exchange_rate:.1f} nICP")
-            message_parts.append(f"• After 6 months: {1000 * exchange_rate:.1f} nICP → {1000:.1f} ICP")
-            # Direct staking gives you the same ICP back after 6 months, so 0% profit
-            # But we should show the comparison properly
-            message_parts.append(f"• **Result: Break-even (0% profit, 0% APY)**")
-            message_parts.append("• ⏱️ 6-month lockup period")
-            message_parts.append("• 💡 This is the baseline to compare against")
-            message_parts.append("")
-            
-            # Show DEX opportunities
-            opportunities = arbitrage_data.get('opportunities', [])
-            viable_opportunities = [opp for opp in opportunities if opp.get('arbitrage', {}).get('viable', False)]
-            
-            if viable_opportunities:
-                message_parts.append("🚀 **DEX Discount Opportunities**")
-                message_parts.append("*(Better than direct staking!)*")
-                message_parts.append("")
-                
-                # Sort by profit percentage
-                viable_opportunities.sort(key=lambda x: x['arbitrage']['profit_percentage_6m'], reverse=True)
-                
-                for i, opp in enumerate(viable_opportunities, 1):
-                    dex_name = opp.get('dex', 'Unknown')
-                    price = opp.get('nicp_price_in_icp', 0)
-                    arbitrage = opp.get('arbitrage', {})
-                    
-                    # Safety check for valid price
-                    if price <= 0:
-                        logger.warning(f"Invalid price for {dex_name}: {price}")
-                        continue
-                    
-                    profit_6m = arbitrage.get('profit_percentage_6m', 0)
-                    apy = arbitrage.get('annualized_return', 0)
-                    
-                    # Calculate example with 1000 ICP - with safety checks
-                    try:
-                        nicp_bought = 1000 / price
-                        future_icp = nicp_bought / exchange_rate if exchange_rate > 0 else nicp_bought
-                        profit_icp = future_icp - 1000
-                    except (ZeroDivisionError, TypeError) as e:
-                        logger.error(f"Error calculating profits for {dex_name}: {e}")
-                        continue
-                    
-                    # Determine emoji based on profit level
-                    if profit_6m >= 20:
-                        emoji = "🚀"
-                    elif profit_6m >= 15:
-                        emoji = "🔥"
-                    elif profit_6m >= 10:
-                        emoji = "✅"
-                    else:
-                        emoji = "💡"
-                    
-                    message_parts.append(f"{emoji} **#{i}. {dex_name}**")
-                    message_parts.append(f"• Price: {price:.6f} ICP per nICP")
-                    message_parts.append(f"• Exchange: 1,000 ICP → {nicp_bought:.1f} nICP")
-                    message_parts.append(f"• After 6 months: {nicp_bought:.1f} nICP → {future_icp:.1f} ICP")
-                    message_parts.append(f"• **Profit: {profit_icp:.1f} ICP ({profit_6m:.1f}% / {apy:.1f}% APY)**")
-                    
-                    # Compare to direct staking
-                    extra_profit = profit_icp - 0
-                    if extra_profit > 0:
-                        message_parts.append(f"• 💰 **+{extra_profit:.1f} ICP more than direct staking!**")
-                    
-                    message_parts.append("")
-                
-                # Summary
-                best_opp = viable_opportunities[0]
-                best_profit = best_opp['arbitrage']['profit_percentage_6m']
-                best_dex = best_opp.get('dex', 'Unknown')
-                
-                message_parts.append("📊 **Summary**")
-                message_parts.append(f"• {len(viable_opportunities)} discount opportunities found")
-                message_parts.append(f"• Best: {best_dex} with {best_profit:.1f}% profit")
-                message_parts.append(f"• All opportunities beat direct staking!")
-                
-            else:
-                message_parts.append("❌ **No DEX Discounts Available**")
-                message_parts.append("Currently, nICP is trading at or above fair value on DEXes.")
-                message_parts.append("")
-                message_parts.append("💡 **Recommendation:** Consider direct WaterNeuron staking")
-                message_parts.append("or wait for better DEX prices.")
-            
-            message_parts.append("")
-            message_parts.append("⚠️ **Important Notes:**")
-            message_parts.append("• 6-month lockup period for all options")
-            message_parts.append("• Prices change constantly - act quickly!")
-            message_parts.append("• Consider gas fees and slippage")
-            message_parts.append("• This is not financial advice")
-            
-            message_parts.append("")
-            message_parts.append("🔄 Use /discount for updated prices")
-            message_parts.append("📈 Use /status for system health")
-            
-            # Send the complete message
-            full_message = "\n".join(message_parts)
-            
-            # Split if too long (Telegram limit ~4096 chars)
-            if len(full_message) > 4000:
-                # Send in parts
-                parts = self._split_long_message(message_parts)
-                await loading_msg.edit_text(parts[0], parse_mode='Markdown')
-                for part in parts[1:]:
-                    await update.message.reply_text(part, parse_mode='Markdown')
-            else:
-                await loading_msg.edit_text(full_message, parse_mode='Markdown')
-                
-        except Exception as e:
-            logger.error(f"Error showing discount opportunities: {e}")
-            error_msg = (
-                "❌ **Error fetching discount data**\n\n"
-                f"Technical details: {str(e)}\n\n"
-                "Please try again in a few minutes or use /status to check system health."
-            )
-            
-            try:
-                await loading_msg.edit_text(error_msg, parse_mode='Markdown')
-            except:
-                await update.message.reply_text(error_msg, parse_mode='Markdown')
 
-    def _split_long_message(self, message_parts: List[str]) -> List[str]:
-        """Split a long message into multiple parts for Telegram"""
-        parts = []
-        current_part = []
-        current_length = 0
-        
-        for line in message_parts:
-            line_length = len(line) + 1  # +1 for newline
-            
-            if current_length + line_length > 4000:
-                # Start a new part
-                if current_part:
-                    parts.append("\n".join(current_part))
-                current_part = [line]
-                current_length = line_length
-            else:
-                current_part.append(line)
-                current_length += line_length
-        
-        # Add the last part
-        if current_part:
-            parts.append("\n".join(current_part))
-        
-        return parts
-
-    async def explain_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Explain nICP discount in detail"""
-        explanation = """
+EXPLANATION_TEXT = """
 📚 **nICP Discount Explained**
 
 🔵 **What is nICP?**
@@ -301,23 +104,9 @@ Ready to find nICP discounts? Try `/discount` to see live data! 🚀
 • Keep some ICP liquid for other opportunities
 
 Ready to check current opportunities? Use `/discount`! 🎯
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🎯 Check Current Opportunity", callback_data="discount")],
-            [InlineKeyboardButton("🧮 Profit Calculator", callback_data="calculator")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            explanation,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
-        )
+"""
 
-    async def calculator_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Interactive profit calculator"""
-        calculator_msg = """
+CALCULATOR_TEXT = """
 🧮 **nICP Discount Calculator**
 
 💰 **Example Calculations:**
@@ -351,23 +140,9 @@ Ready to check current opportunities? Use `/discount`! 🎯
 Profit = (Investment ÷ nICP_Price) × (1.111 - nICP_Price)
 
 Want to see live opportunities? Use `/discount`! 🎯
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🎯 Live Opportunities", callback_data="discount")],
-            [InlineKeyboardButton("📚 Learn More", callback_data="explain")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            calculator_msg,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
-        )
+"""
 
-    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Show help message"""
-        help_text = f"""
+HELP_TEXT = """
 🤖 **nICP Discount Tracker - Commands**
 
 📊 **Main Commands:**
@@ -395,121 +170,8 @@ Want to see live opportunities? Use `/discount`! 🎯
 
 Ready to explore nICP discounts? Use `/discount` to see current opportunities! 🚀
 """
-        
-        await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
 
-    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle button callbacks"""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == "discount":
-            # Create a fake update object for the discount command
-            fake_update = type('obj', (object,), {'message': query.message})()
-            await self.show_discount_opportunities(fake_update, context)
-        elif query.data == "explain":
-            await self.explain_command_callback(query)
-        elif query.data == "calculator":
-            await self.calculator_command_callback(query)
-
-    async def discount_command_callback(self, query):
-        """Handle discount button callback"""
-        await query.edit_message_text("🔍 Checking nICP discount opportunities...")
-        
-        try:
-            # Use async method with WaterNeuron integration
-            arbitrage_data = await self.arbitrage_client.get_nicp_data()
-            
-            if not arbitrage_data.get('opportunities'):
-                await query.edit_message_text("❌ No nICP discount opportunities found at the moment. Try again later!")
-                return
-            
-            # Build response
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            waterneuron_status = arbitrage_data.get('waterneuron_status', '❌ Offline')
-            best = arbitrage_data.get('best_opportunity')
-            
-            header = [
-                "🎯 **nICP Discount Tracker**",
-                f"🕐 Last updated: {timestamp}",
-                f"🌊 WaterNeuron: {waterneuron_status}",
-                "",
-                f"💰 **Best Discount: {best['arbitrage']['profit_percentage_6m']:.1f}%** ({best['exchange']})" if best else "💰 **No viable discounts found**",
-                "",
-                "📊 **Available Discounts:**"
-            ]
-            
-            response_parts = header
-            
-            # Add all opportunities
-            response_parts.append("📋 **All Opportunities:**")
-            for opp in arbitrage_data['opportunities']:
-                arb = opp['arbitrage']
-                status = "✅" if arb['viable'] else "❌"
-                response_parts.append(
-                    f"{status} **{opp['dex']}:** {arb['profit_percentage_6m']:.1f}% profit "
-                    f"(${opp.get('volume_24h_usd', 0):,.0f} vol)"
-                )
-            
-            response_parts.extend([
-                "",
-                "💡 **How it works:**",
-                "1. Buy nICP at discount price on DEX",
-                "2. Dissolve nICP → Get full ICP value",
-                "3. Wait 6 months for unlock",
-                "4. Profit from the discount!",
-                "",
-                "⚠️ **Risks:** 6-month lock-up, market volatility, protocol risk"
-            ])
-            
-            # Calculate potential profit for different amounts
-            profit_examples = []
-            for amount in [100, 500, 1000, 5000]:
-                profit_icp = (amount * best['arbitrage']['profit_percentage_6m']) / 100
-                profit_examples.append(f"• {amount:,} ICP → **+{profit_icp:.0f} ICP** profit")
-            
-            examples_text = "\n".join(profit_examples)
-            
-            explanation = f"""
-💰 **The Discount Opportunity:**
-
-{examples_text}
-
-⏰ **Timeline:** 6-month lock-up period
-📈 **APY:** {best['arbitrage']['annualized_return']:.1f}% annualized return
-
-💡 **How it works:**
-1. Buy nICP at discount price on DEX
-2. Dissolve nICP → Get full ICP value  
-3. Wait 6 months for unlock
-4. Profit from the discount!
-
-⚠️ **Risks:** 6-month lock-up, market volatility, protocol risk
-"""
-            
-            response_parts.append(explanation)
-            
-            # Create action buttons
-            keyboard = [
-                [InlineKeyboardButton("🔄 Refresh", callback_data="discount")],
-                [InlineKeyboardButton("🧮 Calculator", callback_data="calculator")],
-                [InlineKeyboardButton("📚 Learn More", callback_data="explain")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                "\n".join(response_parts),
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=reply_markup
-            )
-            
-        except Exception as e:
-            logger.error(f"Error in discount callback: {e}")
-            await query.edit_message_text("❌ Error fetching data. Please try again.")
-
-    async def explain_command_callback(self, query):
-        """Handle explain button callback"""
-        explanation = """
+QUICK_GUIDE_TEXT = """
 📚 **nICP Discount Quick Guide**
 
 💰 **The Opportunity:**
@@ -529,23 +191,9 @@ Ready to explore nICP discounts? Use `/discount` to see current opportunities! 
 • Low liquidity on some DEXes
 
 Ready to check live opportunities?
-        """
-        
-        keyboard = [
-            [InlineKeyboardButton("🎯 Check Opportunities", callback_data="discount")],
-            [InlineKeyboardButton("🧮 Calculator", callback_data="calculator")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(
-            explanation,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
-        )
+"""
 
-    async def calculator_command_callback(self, query):
-        """Handle calculator button callback"""
-        calculator_msg = """
+QUICK_CALCULATOR_TEXT = """
 🧮 **Quick Profit Calculator**
 
 **Your Investment → Profit:**
@@ -562,45 +210,490 @@ Ready to check live opportunities?
 
 💡 **Formula:**
 Profit = Investment ÷ 0.979 × 0.132
-        """
+"""
+
+NO_DISCOUNTS_TEXT = (
+    "❌ **No DEX Discounts Available**\n"
+    "Currently, nICP is trading at or above fair value on DEXes.\n"
+    "\n"
+    "💡 **Recommendation:** Consider direct WaterNeuron staking\n"
+    "or wait for better DEX prices.\n"
+)
+
+DISCOUNT_FOOTER_TEXT = (
+    "\n"
+    "⚠️ **Important Notes:**\n"
+    "• 6-month lockup period for all options\n"
+    "• Prices change constantly - act quickly!\n"
+    "• Consider gas fees and slippage\n"
+    "• This is not financial advice\n"
+    "\n"
+    "🔄 Use /discount for updated prices\n"
+    "📈 Use /status for system health"
+)
+
+START_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Check Discounts", callback_data="discount")],
+    [InlineKeyboardButton("📚 Learn More", callback_data="explain")],
+    [InlineKeyboardButton("🧮 Calculator", callback_data="calculator")]
+])
+
+EXPLAIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Check Current Opportunity", callback_data="discount")],
+    [InlineKeyboardButton("🧮 Profit Calculator", callback_data="calculator")]
+])
+
+CALCULATOR_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Live Opportunities", callback_data="discount")],
+    [InlineKeyboardButton("📚 Learn More", callback_data="explain")]
+])
+
+QUICK_GUIDE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Check Opportunities", callback_data="discount")],
+    [InlineKeyboardButton("🧮 Calculator", callback_data="calculator")]
+])
+
+QUICK_CALCULATOR_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Live Data", callback_data="discount")],
+    [InlineKeyboardButton("📚 Learn More", callback_data="explain")]
+])
+
+class TelegramBot:
+    # Seconds a fetched arbitrage snapshot is shared between all users
+    ARBITRAGE_CACHE_TTL = 30
+    
+    # Seconds the background refresher waits after a failed fetch before retrying
+    REFRESH_RETRY_DELAY = 5
+    
+    def __init__(self, token: str, database: Database, arbitrage_client: Optional[NICPArbitrageClient] = None):
+        self.token = token
+        self.database = database
+        
+        # Share the caller's client (and its HTTP session) when given, otherwise own one
+        self._owns_arbitrage_client = arbitrage_client is None
+        self.arbitrage_client = arbitrage_client or NICPArbitrageClient()
+        self.application = None
+        
+        # Latest arbitrage snapshot and the fetch currently in flight, if any
+        self._arbitrage_cache = None
+        self._arbitrage_cache_time = 0.0
+        self._arbitrage_fetch = None
+        
+        # (arbitrage snapshot, rendered message parts) for the last /discount reply
+        self._rendered_discount = None
+        
+        # Strong references to background tasks, the event loop only keeps weak ones
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # Inline button callback_data -> handler(query, context)
+        self._callbacks = {
+            "discount": self._cb_discount,
+            "explain": self.explain_command_callback,
+            "calculator": self.calculator_command_callback,
+        }
+    
+    def _has_fresh_arbitrage(self) -> bool:
+        """Whether the shared snapshot is younger than ARBITRAGE_CACHE_TTL"""
+        return (self._arbitrage_cache is not None and
+                time.monotonic() - self._arbitrage_cache_time < self.ARBITRAGE_CACHE_TTL)
+    
+    async def _get_cached_arbitrage(self, force: bool = False) -> Dict:
+        """Get arbitrage data, reusing a fresh snapshot or joining the fetch in flight"""
+        if not force and self._has_fresh_arbitrage():
+            return self._arbitrage_cache
+        
+        # Concurrent callers share one fetch instead of each hitting the DEXes
+        if self._arbitrage_fetch is None or self._arbitrage_fetch.done():
+            self._arbitrage_fetch = asyncio.ensure_future(self._fetch_arbitrage())
+        
+        # Shielded so one user's cancelled request doesn't abort everyone else's fetch
+        return await asyncio.shield(self._arbitrage_fetch)
+    
+    async def _fetch_arbitrage(self) -> Dict:
+        """Fetch fresh arbitrage data and store it as the shared snapshot"""
+        arbitrage_data = await self.arbitrage_client.get_nicp_arbitrage_data()
+        self._arbitrage_cache = arbitrage_data
+        self._arbitrage_cache_time = time.monotonic()
+        return arbitrage_data
+    
+    async def _refresh_loop(self):
+        """Keep the shared snapshot warm so /discount never waits on a cold fetch"""
+        while True:
+            try:
+                await self._get_cached_arbitrage(force=True)
+                await asyncio.sleep(self.ARBITRAGE_CACHE_TTL)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background arbitrage refresh failed")
+                await asyncio.sleep(self.REFRESH_RETRY_DELAY)
+    
+    def _start_background_task(self, coro) -> asyncio.Task:
+        """Run coro in the background, holding a reference until it finishes"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return task
+    
+    def _on_background_task_done(self, task: asyncio.Future):
+        """Drop the finished task and surface its error, nobody awaits it"""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Background task failed", exc_info=task.exception())
+        
+    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /start command with nICP discount focus"""
+        user_id = update.effective_user.id
+        username = update.effective_user.username or "Unknown"
+        
+        # Store user in database off the event loop; the reply doesn't depend on it
+        loop = asyncio.get_running_loop()
+        self._start_background_task(loop.run_in_executor(None, self.database.add_user, user_id, username))
+        
+        await update.message.reply_text(
+            WELCOME_TEXT,
+            reply_markup=START_KEYBOARD
+        )
+
+    async def discount_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /discount command"""
+        await self.show_discount_opportunities(update.message, context)
+
+    async def show_discount_opportunities(self, message: Message, context: ContextTypes.DEFAULT_TYPE):
+        """Show current nICP discount opportunities with clear comparison, replying to message"""
+        try:
+            logger.info("💰 User requested discount opportunities")
+            
+            # Get arbitrage data (shared across users for a short TTL). The background
+            # refresher normally keeps it warm; if a fetch is needed, show "typing..."
+            # meanwhile instead of sending and later editing a placeholder message
+            if self._has_fresh_arbitrage():
+                arbitrage_data = await self._get_cached_arbitrage()
+            else:
+                arbitrage_data, _ = await asyncio.gather(
+                    self._get_cached_arbitrage(),
+                    message.reply_chat_action(ChatAction.TYPING)
+                )
+            
+            if not arbitrage_data or not arbitrage_data.get('opportunities'):
+                await message.reply_text(
+                    "❌ **No Data Available**\n\n"
+                    "Could not fetch nICP price data from DEXes.\n"
+                    "Please try again in a few minutes.\n\n"
+                    "💡 Use /status to check API health."
+                )
+                return
+            
+            # Rendered text only depends on the data, so reuse it while the snapshot is shared
+            if self._rendered_discount is not None and self._rendered_discount[0] is arbitrage_data:
+                parts = self._rendered_discount[1]
+            else:
+                parts = self._render_discount_message(arbitrage_data)
+                self._rendered_discount = (arbitrage_data, parts)
+            
+            # Send the complete message, in parts (one after another, to keep their order) if it was split
+            for part in parts:
+                await message.reply_text(part)
+                
+        except Exception as e:
+            logger.error("Error showing discount opportunities: %s", e)
+            error_msg = (
+                "❌ **Error fetching discount data**\n\n"
+                f"Technical details: {escape_markdown(str(e))}\n\n"
+                "Please try again in a few minutes or use /status to check system health."
+            )
+            
+            await message.reply_text(error_msg)
+
+    def _render_discount_message(self, arbitrage_data: Dict) -> List[str]:
+        """Render the discount overview, split into parts that fit a Telegram message"""
+        # Header with WaterNeuron status
+        waterneuron_data = arbitrage_data.get('waterneuron_data')
+        if waterneuron_data and waterneuron_data.get('success'):
+            wn_status = "✅ Live WaterNeuron data"
+            exchange_rate = waterneuron_data.get('nicp_to_icp_rate', 0.9001)
+        else:
+            wn_status = "⚠️ Using fallback rates"
+            exchange_rate = 0.9001
+        
+        # Show direct staking option first for comparison. Direct staking gives you
+        # the same ICP back after 6 months, so it is the 0% profit baseline
+        header = (
+            f"🎯 **nICP Discount Opportunities**\n"
+            f"🌊 {wn_status}\n"
+            f"📅 Current exchange rate: 1 ICP = {exchange_rate:.4f} nICP\n"
+            f"\n"
+            f"🏛️ **Direct WaterNeuron Staking**\n"
+            f"• Exchange: 1,000 ICP → {1000 * exchange_rate:.1f} nICP\n"
+            f"• After 6 months: {1000 * exchange_rate:.1f} nICP → {1000:.1f} ICP\n"
+            f"• **Result: Break-even (0% profit, 0% APY)**\n"
+            f"• ⏱️ 6-month lockup period\n"
+            f"• 💡 This is the baseline to compare against\n"
+            f"\n"
+        )
         
-        keyboard = [
-            [InlineKeyboardButton("🎯 Live Data", callback_data="discount")],
-            [InlineKeyboardButton("📚 Learn More", callback_data="explain")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Show DEX opportunities, already filtered and sorted by profit by the client
+        viable_opportunities = arbitrage_data.get('viable_opportunities', [])
         
+        if viable_opportunities:
+            # ICP returned per nICP after dissolution is the same for every DEX
+            icp_per_nicp = 1 / exchange_rate if exchange_rate > 0 else 1.0
+            
+            opportunity_blocks = []
+            for i, opp in enumerate(viable_opportunities, 1):
+                # Read each field once; the viable filter guarantees 'arbitrage' exists.
+                # The DEX name is the only free text here, escaped once for Markdown
+                dex_name = escape_markdown(opp.get('dex', 'Unknown'))
+                price = opp.get('nicp_price_in_icp', 0)
+                arbitrage = opp['arbitrage']
+                profit_6m = arbitrage.get('profit_percentage_6m', 0)
+                apy = arbitrage.get('annualized_return', 0)
+                
+                # List is sorted, so the first entry is the best one for the summary
+                if i == 1:
+                    best_dex, best_profit = dex_name, profit_6m
+                
+                # Safety check for valid price
+                if price <= 0:
+                    logger.warning("Invalid price for %s: %s", dex_name, price)
+                    continue
+                
+                # Calculate example with 1000 ICP - with safety checks
+                try:
+                    nicp_bought = 1000 / price
+                    future_icp = nicp_bought * icp_per_nicp
+                    profit_icp = future_icp - 1000
+                except (ZeroDivisionError, TypeError) as e:
+                    logger.error("Error calculating profits for %s: %s", dex_name, e)
+                    continue
+                
+                # Determine emoji based on profit level
+                emoji = PROFIT_TIER_EMOJIS[bisect.bisect_right(PROFIT_TIERS, profit_6m)]
+                
+                # Compare to direct staking
+                extra_profit = profit_icp - 0
+                extra_line = f"• 💰 **+{_F1(extra_profit)} ICP more than direct staking!**\n" if extra_profit > 0 else ""
+                
+                nicp_bought_text = _F1(nicp_bought)
+                opportunity_blocks.append(
+                    f"{emoji} **#{i}. {dex_name}**\n"
+                    f"• Price: {_F6(price)} ICP per nICP\n"
+                    f"• Exchange: 1,000 ICP → {nicp_bought_text} nICP\n"
+                    f"• After 6 months: {nicp_bought_text} nICP → {_F1(future_icp)} ICP\n"
+                    f"• **Profit: {_F1(profit_icp)} ICP ({_F1(profit_6m)}% / {_F1(apy)}% APY)**\n"
+                    f"{extra_line}"
+                    f"\n"
+                )
+            
+            # Summary
+            body = (
+                "🚀 **DEX Discount Opportunities**\n"
+                "*(Better than direct staking!)*\n"
+                "\n"
+                f"{''.join(opportunity_blocks)}"
+                "📊 **Summary**\n"
+                f"• {len(viable_opportunities)} discount opportunities found\n"
+                f"• Best: {best_dex} with {best_profit:.1f}% profit\n"
+                "• All opportunities beat direct staking!\n"
+            )
+        else:
+            body = NO_DISCOUNTS_TEXT
+        
+        # Assemble the complete message
+        full_message = f"{header}{body}{DISCOUNT_FOOTER_TEXT}"
+        
+        # Split if too long for a single Telegram message
+        if not _fits_in_message(full_message):
+            return self._split_long_message(full_message.split("\n"))
+        return [full_message]
+
+    def _split_long_message(self, message_parts: List[str]) -> List[str]:
+        """Split a long message into multiple parts for Telegram"""
+        # Telegram counts UTF-16 code units, emoji take two; +1 for the joining newline
+        lengths = [_utf16_len(line) + 1 for line in message_parts]
+        
+        parts = []
+        start = 0
+        current_length = 0
+        for i, line_length in enumerate(lengths):
+            # The last line of a part has no trailing newline, hence the + 1
+            if current_length + line_length > TELEGRAM_MESSAGE_LIMIT + 1 and i > start:
+                parts.append("\n".join(message_parts[start:i]))
+                start = i
+                current_length = 0
+            current_length += line_length
+        
+        # Add the last part
+        if start < len(message_parts):
+            parts.append("\n".join(message_parts[start:]))
+        
+        return parts
+
+    async def explain_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Explain nICP discount in detail"""
+        await update.message.reply_text(
+            EXPLANATION_TEXT,
+            reply_markup=EXPLAIN_KEYBOARD
+        )
+
+    async def calculator_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Interactive profit calculator"""
+        await update.message.reply_text(
+            CALCULATOR_TEXT,
+            reply_markup=CALCULATOR_KEYBOARD
+        )
+
+    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show help message"""
+        await update.message.reply_text(HELP_TEXT)
+
+    async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle button callbacks"""
+        query = update.callback_query
+        await query.answer()
+        
+        handler = self._callbacks.get(query.data)
+        if handler:
+            await handler(query, context)
+
+    async def _cb_discount(self, query, context: ContextTypes.DEFAULT_TYPE):
+        """Handle discount button callback by replying with the full overview"""
+        await self.show_discount_opportunities(query.message, context)
+
+    async def explain_command_callback(self, query, context: ContextTypes.DEFAULT_TYPE):
+        """Handle explain button callback"""
         await query.edit_message_text(
-            calculator_msg,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=reply_markup
+            QUICK_GUIDE_TEXT,
+            reply_markup=QUICK_GUIDE_KEYBOARD
         )
 
+    async def calculator_command_callback(self, query, context: ContextTypes.DEFAULT_TYPE):
+        """Handle calculator button callback"""
+        await query.edit_message_text(
+            QUICK_CALCULATOR_TEXT,
+            reply_markup=QUICK_CALCULATOR_KEYBOARD
+        )
+
+    async def send_alert_to_user(self, telegram_id: int, message: str) -> bool:
+        """Send an alert message to one user, returning whether it was delivered"""
+        try:
+            await self.application.bot.send_message(
+                chat_id=telegram_id,
+                text=message
+            )
+            return True
+        except Exception as e:
+            logger.error("Failed to send alert to user %s: %s", telegram_id, e)
+            return False
+
+    async def send_channel_update(self, channel_id: str, message: str) -> bool:
+        """Post an update to a channel, returning whether it was delivered"""
+        try:
+            await self.application.bot.send_message(
+                chat_id=channel_id,
+                text=message
+            )
+            return True
+        except Exception as e:
+            logger.error("Failed to send channel update to %s: %s", channel_id, e)
+            return False
+
     async def start_bot(self):
-        """Start the Telegram bot"""
+        """Start the Telegram bot on the running event loop.
+
+        Returns once polling has started; updates are then processed in the
+        background until stop_bot() is awaited. If TELEGRAM_WEBHOOK_URL is set,
+        updates are pushed to a webhook server; otherwise getUpdates long-polls
+        with a 50s server-side timeout, so an idle bot makes about one request
+        per 50s instead of short-polling.
+        """
         logger.info("Starting nICP Discount Telegram bot...")
         
-        # Create application
-        self.application = Application.builder().token(self.token).build()
+        # Open the pooled HTTP session used for arbitrage fetches
+        if self._owns_arbitrage_client:
+            await self.arbitrage_client.__aenter__()
+        
+        # Upper bound on updates handled at the same time
+        max_concurrency = int(os.getenv('BOT_MAX_CONCURRENCY', '256'))
         
-        # Add handlers
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CommandHandler("discount", self.show_discount_opportunities))
-        self.application.add_handler(CommandHandler("explain", self.explain_command))
-        self.application.add_handler(CommandHandler("calculator", self.calculator_command))
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CallbackQueryHandler(self.button_callback))
+        # Create application; the rate limiter queues sends to stay inside Telegram's
+        # flood limits (30 msg/s overall, 20 msg/min per group) instead of hitting RetryAfter
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            # Every reply is legacy Markdown, so set it once instead of on each call
+            .defaults(Defaults(parse_mode=ParseMode.MARKDOWN))
+            .rate_limiter(AIORateLimiter(
+                overall_max_rate=30,
+                overall_time_period=1,
+                group_max_rate=20,
+                group_time_period=60,
+                max_retries=3
+            ))
+            # Handle updates concurrently, but never more than max_concurrency at once so a
+            # burst queues up instead of piling onto the DEX APIs; the request pool matches
+            .concurrent_updates(max_concurrency)
+            .connection_pool_size(max_concurrency)
+            .build()
+        )
+        
+        # Add handlers, one table so cross-cutting wrappers can be applied in one place
+        commands = (
+            ("start", self.start_command),
+            ("discount", self.discount_command),
+            ("explain", self.explain_command),
+            ("calculator", self.calculator_command),
+            ("help", self.help_command),
+        )
+        self.application.add_handlers(
+            [CommandHandler(name, callback) for name, callback in commands]
+            + [CallbackQueryHandler(self.button_callback)]
+        )
         
         # Start the bot
         await self.application.initialize()
         await self.application.start()
-        await self.application.updater.start_polling()
         
-        # Keep running
-        await self.application.updater.idle()
+        # Only commands and button presses are handled, so don't have Telegram deliver anything else
+        allowed_updates = [Update.MESSAGE, Update.CALLBACK_QUERY]
+        
+        # With a public endpoint configured, Telegram pushes updates to us instead of being polled
+        webhook_url = os.getenv('TELEGRAM_WEBHOOK_URL')
+        if webhook_url:
+            await self.application.updater.start_webhook(
+                listen=os.getenv('TELEGRAM_WEBHOOK_LISTEN') or '0.0.0.0',
+                port=int(os.getenv('TELEGRAM_WEBHOOK_PORT') or '8443'),
+                url_path=os.getenv('TELEGRAM_WEBHOOK_PATH', ''),
+                webhook_url=webhook_url,
+                # Empty values from config.env mean unset; PTB only skips the header check for None
+                secret_token=os.getenv('TELEGRAM_WEBHOOK_SECRET') or None,
+                # Let Telegram open as many parallel deliveries as we handle (API maximum is 100)
+                max_connections=min(max_concurrency, 100),
+                allowed_updates=allowed_updates
+            )
+            logger.info("Receiving updates via webhook at %s", webhook_url)
+        else:
+            await self.application.updater.start_polling(poll_interval=0.0, timeout=50, allowed_updates=allowed_updates)
+        
+        # Refresh arbitrage data in the background from now on, unless the client is
+        # shared with an owner (main.py) that already polls it on its own schedule
+        if self._owns_arbitrage_client:
+            self._start_background_task(self._refresh_loop())
 
     async def stop_bot(self):
         """Stop the Telegram bot"""
+        # Stop the background refresher (and anything else started alongside it)
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        
         if self.application:
-            await self.application.stop()
-            await self.application.shutdown() 
\ No newline at end of file
+            if self.application.updater.running:
+                await self.application.updater.stop()
+            # start_bot may have failed part-way, so only undo what actually started
+            if self.application.running:
+                await self.application.stop()
+            await self.application.shutdown()
+        
+        if self._owns_arbitrage_client:
+            await self.arbitrage_client.__aexit__(None, None, None) 
\ No newline at end of file
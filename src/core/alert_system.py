@@ -1,5 +1,7 @@
 import logging
 import asyncio
+import functools
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from .database import Database
@@ -7,12 +9,79 @@ from .api_client import APIClient
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=4)
+def _clock_time(epoch_second: int) -> str:
+    """HH:MM:SS for a whole epoch second, formatted once per second however many alerts use it"""
+    return time.strftime('%H:%M:%S', time.localtime(epoch_second))
+
+# Alert message templates, only the dynamic fields are filled in per alert
+PRICE_UP_TEMPLATE = """
+🚀 **PRICE ALERT: {pair}** 🚀
+
+📈 **Price is UP {change:+.2f}%!**
+💰 Current Price: ${price:.6f}
+⚡ Your Alert: +{threshold}% threshold
+
+🎯 Your alert has been triggered!
+🕒 {time}
+
+#PriceAlert #{tag}
+""".strip()
+
+PRICE_DOWN_TEMPLATE = """
+📉 **PRICE ALERT: {pair}** 📉
+
+🔻 **Price is DOWN {change:.2f}%!**
+💰 Current Price: ${price:.6f}
+⚡ Your Alert: -{threshold}% threshold
+
+⚠️ Your alert has been triggered!
+🕒 {time}
+
+#PriceAlert #{tag}
+""".strip()
+
+VOLUME_SPIKE_TEMPLATE = """
+📊 **VOLUME ALERT: {pair}** 📊
+
+🔥 **Volume SPIKE +{change:.2f}%!**
+💰 Current Price: ${price:.6f}
+⚡ Your Alert: +{threshold}% volume threshold
+
+📈 Unusual trading activity detected!
+🕒 {time}
+
+#VolumeAlert #{tag}
+""".strip()
+
+SIGNIFICANT_MOVE_TEMPLATE = """
+🚨 **SIGNIFICANT MOVE DETECTED** 🚨
+
+🪙 **{pair}**
+💰 Price: ${price:.6f}
+📈 Change: {change:+.2f}% (1h)
+
+This is a notable price movement!
+🕒 {time}
+""".strip()
+
 class AlertSystem:
+    # Seconds fetched prices are shared between alert checks and channel updates
+    PRICE_CACHE_TTL = 10
+    
+    # Cooldown groups of alerts processed (and their messages sent) concurrently per batch
+    ALERT_BATCH_SIZE = 25
+    
     def __init__(self, db: Database, api_client: APIClient, telegram_bot=None):
         self.db = db
         self.api_client = api_client
         self.telegram_bot = telegram_bot
         
+        # Latest price snapshot; the lock makes concurrent callers share one fetch
+        self._price_cache = None
+        self._price_cache_time = 0.0
+        self._price_lock = asyncio.Lock()
+        
         # Alert cooldown to prevent spam
         self.alert_cooldown = 300  # 5 minutes in seconds
         self.last_alerts = {}  # Track last alert time per user/pair
@@ -24,29 +93,94 @@ class AlertSystem:
             'volume_spike': 50.0  # 50% volume increase
         }
     
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking database or HTTP call in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    async def get_current_prices(self) -> Dict[str, Dict]:
+        """Get current prices, reusing a snapshot younger than PRICE_CACHE_TTL
+
+        If the upstream fetch fails or comes back empty, the last known snapshot is served instead.
+        """
+        async with self._price_lock:
+            if (self._price_cache is not None and
+                    time.monotonic() - self._price_cache_time < self.PRICE_CACHE_TTL):
+                return self._price_cache
+            
+            try:
+                current_prices = await self._run_blocking(self.api_client.get_icp_prices)
+            except Exception as e:
+                if self._price_cache is None:
+                    raise
+                logger.warning("Price fetch failed, using stale prices from %.0fs ago: %s",
+                               time.monotonic() - self._price_cache_time, e)
+                return self._price_cache
+            
+            if not current_prices:
+                # An empty result is an upstream failure too, not "no pairs"
+                if self._price_cache is not None:
+                    logger.warning("Price fetch returned no data, using stale prices from %.0fs ago",
+                                   time.monotonic() - self._price_cache_time)
+                    return self._price_cache
+                return current_prices
+            
+            self._price_cache = current_prices
+            self._price_cache_time = time.monotonic()
+            return current_prices
+    
     async def check_all_alerts(self):
         """Check all active alerts and trigger notifications"""
         try:
             logger.info("Checking all active alerts...")
             
-            # Get current price data
-            current_prices = self.api_client.get_icp_prices()
+            # Get current price data and all active alerts; they're independent, so
+            # the upstream fetch and the database read overlap
+            current_prices, active_alerts = await asyncio.gather(
+                self.get_current_prices(),
+                self._run_blocking(self.db.get_all_active_alerts)
+            )
             if not current_prices:
                 logger.warning("No price data available for alert checking")
                 return
             
-            # Get all active alerts
-            active_alerts = self.db.get_all_active_alerts()
-            logger.info(f"Processing {len(active_alerts)} active alerts")
+            logger.info("Processing %d active alerts", len(active_alerts))
+            
+            # One query for the 24h change of every alerted pair instead of one per alert
+            price_changes = await self._run_blocking(
+                self.db.get_price_changes, list({alert['pair'] for alert in active_alerts}), 24
+            )
             
+            # Alerts sharing a cooldown key must run in order so only the first one sends;
+            # different keys are independent and processed in concurrent batches so one
+            # slow send doesn't stall every other alert
+            alert_groups = {}
             for alert in active_alerts:
-                await self.process_alert(alert, current_prices)
+                alert_groups.setdefault(self.get_cooldown_key(alert), []).append(alert)
+            alert_groups = list(alert_groups.values())
+            
+            for start in range(0, len(alert_groups), self.ALERT_BATCH_SIZE):
+                await asyncio.gather(*(
+                    self.process_alert_group(alerts, current_prices, price_changes)
+                    for alerts in alert_groups[start:start + self.ALERT_BATCH_SIZE]
+                ))
             
         except Exception as e:
-            logger.error(f"Error checking alerts: {e}")
+            logger.error("Error checking alerts: %s", e)
+    
+    def get_cooldown_key(self, alert: Dict) -> str:
+        """Cooldown key shared by all of a user's alerts of one type on one pair"""
+        return f"{alert['user_id']}_{alert['pair']}_{alert['alert_type']}"
     
-    async def process_alert(self, alert: Dict, current_prices: Dict[str, Dict]):
-        """Process individual alert"""
+    async def process_alert_group(self, alerts: List[Dict], current_prices: Dict[str, Dict],
+                                  price_changes: Optional[Dict[str, float]] = None):
+        """Process alerts sharing a cooldown key one after another"""
+        for alert in alerts:
+            await self.process_alert(alert, current_prices, price_changes)
+    
+    async def process_alert(self, alert: Dict, current_prices: Dict[str, Dict],
+                            price_changes: Optional[Dict[str, float]] = None):
+        """Process individual alert (price_changes holds prefetched 24h changes by pair)"""
         try:
             pair = alert['pair']
             alert_type = alert['alert_type']
@@ -57,19 +191,22 @@ class AlertSystem:
             
             # Check if we have current price data for this pair
             if pair not in current_prices:
-                logger.debug(f"No current price data for pair {pair}")
+                logger.debug("No current price data for pair %s", pair)
                 return
             
             current_price_data = current_prices[pair]
             current_price = current_price_data['price']
             
             # Check cooldown
-            cooldown_key = f"{user_id}_{pair}_{alert_type}"
+            cooldown_key = self.get_cooldown_key(alert)
             if self.is_in_cooldown(cooldown_key):
                 return
             
             # Get historical data for comparison
-            price_change_24h = self.db.get_price_change(pair, 24)
+            if price_changes is not None:
+                price_change_24h = price_changes.get(pair)
+            else:
+                price_change_24h = await self._run_blocking(self.db.get_price_change, pair, 24)
             
             # Check if alert condition is met
             should_trigger = False
@@ -95,55 +232,31 @@ class AlertSystem:
             if should_trigger and alert_message:
                 await self.trigger_alert(alert_id, telegram_id, user_id, pair, alert_message, current_price, price_change_24h)
                 self.set_cooldown(cooldown_key)
-                logger.info(f"Alert triggered for user {telegram_id}, pair {pair}, type {alert_type}")
+                logger.info("Alert triggered for user %s, pair %s, type %s", telegram_id, pair, alert_type)
             
         except Exception as e:
-            logger.error(f"Error processing alert: {e}")
+            logger.error("Error processing alert: %s", e)
     
     def create_price_up_message(self, pair: str, current_price: float, price_change: float, threshold: float) -> str:
         """Create price increase alert message"""
-        return f"""
-🚀 **PRICE ALERT: {pair}** 🚀
-
-📈 **Price is UP {price_change:+.2f}%!**
-💰 Current Price: ${current_price:.6f}
-⚡ Your Alert: +{threshold}% threshold
-
-🎯 Your alert has been triggered!
-🕒 {datetime.now().strftime('%H:%M:%S')}
-
-#PriceAlert #{pair.replace('/', '')}
-        """.strip()
+        return PRICE_UP_TEMPLATE.format(
+            pair=pair, tag=pair.replace('/', ''), price=current_price, change=price_change,
+            threshold=threshold, time=_clock_time(int(time.time()))
+        )
     
     def create_price_down_message(self, pair: str, current_price: float, price_change: float, threshold: float) -> str:
         """Create price decrease alert message"""
-        return f"""
-📉 **PRICE ALERT: {pair}** 📉
-
-🔻 **Price is DOWN {price_change:.2f}%!**
-💰 Current Price: ${current_price:.6f}
-⚡ Your Alert: -{threshold}% threshold
-
-⚠️ Your alert has been triggered!
-🕒 {datetime.now().strftime('%H:%M:%S')}
-
-#PriceAlert #{pair.replace('/', '')}
-        """.strip()
+        return PRICE_DOWN_TEMPLATE.format(
+            pair=pair, tag=pair.replace('/', ''), price=current_price, change=price_change,
+            threshold=threshold, time=_clock_time(int(time.time()))
+        )
     
     def create_volume_spike_message(self, pair: str, current_price: float, volume_change: float, threshold: float) -> str:
         """Create volume spike alert message"""
-        return f"""
-📊 **VOLUME ALERT: {pair}** 📊
-
-🔥 **Volume SPIKE +{volume_change:.2f}%!**
-💰 Current Price: ${current_price:.6f}
-⚡ Your Alert: +{threshold}% volume threshold
-
-📈 Unusual trading activity detected!
-🕒 {datetime.now().strftime('%H:%M:%S')}
-
-#VolumeAlert #{pair.replace('/', '')}
-        """.strip()
+        return VOLUME_SPIKE_TEMPLATE.format(
+            pair=pair, tag=pair.replace('/', ''), price=current_price, change=volume_change,
+            threshold=threshold, time=_clock_time(int(time.time()))
+        )
     
     async def trigger_alert(self, alert_id: int, telegram_id: int, user_id: int, pair: str, 
                           message: str, price: float, price_change: float = None):
@@ -154,21 +267,21 @@ class AlertSystem:
                 success = await self.telegram_bot.send_alert_to_user(telegram_id, message)
                 if success:
                     # Log the alert in database
-                    self.db.log_alert_sent(user_id, alert_id, pair, message, price, price_change)
-                    logger.info(f"Alert sent successfully to user {telegram_id}")
+                    await self._run_blocking(self.db.log_alert_sent, user_id, alert_id, pair, message, price, price_change)
+                    logger.info("Alert sent successfully to user %s", telegram_id)
                 else:
-                    logger.error(f"Failed to send alert to user {telegram_id}")
+                    logger.error("Failed to send alert to user %s", telegram_id)
             else:
                 logger.warning("Telegram bot not available for sending alerts")
                 
         except Exception as e:
-            logger.error(f"Error triggering alert: {e}")
+            logger.error("Error triggering alert: %s", e)
     
     async def calculate_volume_change(self, pair: str) -> Optional[float]:
         """Calculate volume change over 24 hours"""
         try:
             # Get current volume
-            latest_price_data = self.db.get_latest_price(pair)
+            latest_price_data = await self._run_blocking(self.db.get_latest_price, pair)
             if not latest_price_data:
                 return None
             
@@ -183,7 +296,7 @@ class AlertSystem:
             return None
             
         except Exception as e:
-            logger.error(f"Error calculating volume change: {e}")
+            logger.error("Error calculating volume change: %s", e)
             return None
     
     def is_in_cooldown(self, cooldown_key: str) -> bool:
@@ -209,28 +322,32 @@ class AlertSystem:
             logger.info("Preparing market update for channel")
             
             # Get current prices
-            current_prices = self.api_client.get_icp_prices()
+            current_prices = await self.get_current_prices()
             if not current_prices:
                 logger.warning("No price data for market update")
                 return
             
-            # Create market update message
-            message = "📊 **ICP Market Update** 📊\n\n"
+            # Create market update message, collected in parts and joined once
+            parts = ["📊 **ICP Market Update** 📊\n\n"]
+            price_changes = await self._run_blocking(self.db.get_price_changes, list(current_prices), 24)
             
             for pair, price_data in current_prices.items():
                 price = price_data['price']
                 volume = price_data.get('volume_24h', 0)
-                price_change = self.db.get_price_change(pair, 24)
+                price_change = price_changes.get(pair)
                 
                 change_emoji = "📈" if price_change and price_change > 0 else "📉" if price_change and price_change < 0 else "➡️"
                 change_text = f"{price_change:+.2f}%" if price_change else "N/A"
                 
-                message += f"🪙 **{pair}**\n"
-                message += f"💰 ${price:.6f} {change_emoji} {change_text}\n"
-                message += f"📊 Volume: ${volume:.2f}\n\n"
+                parts.append(
+                    f"🪙 **{pair}**\n"
+                    f"💰 ${price:.6f} {change_emoji} {change_text}\n"
+                    f"📊 Volume: ${volume:.2f}\n\n"
+                )
             
-            message += f"🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            message += f"🤖 @your_bot_username | Join our community!"
+            parts.append(f"🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            parts.append("🤖 @your_bot_username | Join our community!")
+            message = "".join(parts)
             
             # Send to channel
             if self.telegram_bot:
@@ -241,19 +358,20 @@ class AlertSystem:
                     logger.error("Failed to send market update to channel")
             
         except Exception as e:
-            logger.error(f"Error sending market updates: {e}")
+            logger.error("Error sending market updates: %s", e)
     
     async def check_significant_moves(self, threshold: float = 10.0):
         """Check for significant price movements and send notifications"""
         try:
-            current_prices = self.api_client.get_icp_prices()
+            current_prices = await self.get_current_prices()
             if not current_prices:
                 return
             
             significant_moves = []
+            price_changes = await self._run_blocking(self.db.get_price_changes, list(current_prices), 1)  # 1 hour change
             
             for pair, price_data in current_prices.items():
-                price_change = self.db.get_price_change(pair, 1)  # 1 hour change
+                price_change = price_changes.get(pair)
                 
                 if price_change and abs(price_change) >= threshold:
                     significant_moves.append({
@@ -265,24 +383,18 @@ class AlertSystem:
             # Send notifications for significant moves
             if significant_moves and self.telegram_bot:
                 for move in significant_moves:
-                    message = f"""
-🚨 **SIGNIFICANT MOVE DETECTED** 🚨
-
-🪙 **{move['pair']}**
-💰 Price: ${move['price']:.6f}
-📈 Change: {move['change']:+.2f}% (1h)
-
-This is a notable price movement!
-🕒 {datetime.now().strftime('%H:%M:%S')}
-                    """.strip()
+                    message = SIGNIFICANT_MOVE_TEMPLATE.format(
+                        pair=move['pair'], price=move['price'], change=move['change'],
+                        time=_clock_time(int(time.time()))
+                    )
                     
                     # This could be sent to a special alerts channel
                     # await self.telegram_bot.send_channel_update(alerts_channel_id, message)
                     
-                logger.info(f"Significant move detected: {move['pair']} {move['change']:+.2f}%")
+                logger.info("Significant move detected: %s %+.2f%%", move['pair'], move['change'])
         
         except Exception as e:
-            logger.error(f"Error checking significant moves: {e}")
+            logger.error("Error checking significant moves: %s", e)
     
     async def cleanup_old_alerts(self):
         """Clean up old triggered alerts and inactive users"""
@@ -294,7 +406,7 @@ This is a notable price movement!
             logger.info("Alert cleanup completed")
             
         except Exception as e:
-            logger.error(f"Error during alert cleanup: {e}")
+            logger.error("Error during alert cleanup: %s", e)
     
     def get_alert_statistics(self) -> Dict:
         """Get statistics about alerts"""
@@ -309,5 +421,5 @@ This is a notable price movement!
             }
             
         except Exception as e:
-            logger.error(f"Error getting alert statistics: {e}")
+            logger.error("Error getting alert statistics: %s", e)
             return {} 
\ No newline at end of file
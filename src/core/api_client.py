@@ -31,6 +31,12 @@ class APIClient:
         self.CKUSDT_CANISTER = 'cngnf-vqaaa-aaaar-qag4q-cai'
         self.CKUSDC_CANISTER = 'xevnm-gaaaa-aaaar-qafnq-cai'
         
+        # nICP/ICP in either direction, as (base, target) canister pairs
+        self.NICP_ICP_PAIRS = frozenset({
+            (self.NICP_CANISTER, self.ICP_CANISTER),
+            (self.ICP_CANISTER, self.NICP_CANISTER)
+        })
+        
         # Cache to avoid too frequent requests
         self.cache = {}
         self.cache_duration = 30  # seconds
@@ -145,8 +151,7 @@ class APIClient:
                 target_currency = item.get('target_currency', '')
                 
                 # Check for nICP/ICP pair in either direction
-                if ((base_currency == self.NICP_CANISTER and target_currency == self.ICP_CANISTER) or
-                    (base_currency == self.ICP_CANISTER and target_currency == self.NICP_CANISTER)):
+                if (base_currency, target_currency) in self.NICP_ICP_PAIRS:
                     
                     last_price = float(item.get('last_price', 0))
                     if last_price <= 0:
@@ -201,8 +206,7 @@ class APIClient:
                 target_id = ticker.get('target_currency', '') or ticker.get('target_id', '')
                 
                 # Check for nICP/ICP pair in either direction
-                if ((base_id == self.NICP_CANISTER and target_id == self.ICP_CANISTER) or
-                    (base_id == self.ICP_CANISTER and target_id == self.NICP_CANISTER)):
+                if (base_id, target_id) in self.NICP_ICP_PAIRS:
                     
                     last_price = float(ticker.get('last_price', 0))
                     if last_price <= 0:
@@ -1,6 +1,7 @@
 import sqlite3
 import logging
 import os
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 
@@ -9,19 +10,37 @@ logger = logging.getLogger(__name__)
 class Database:
     def __init__(self, db_path: str = "./data/icp_monitor.db"):
         self.db_path = db_path
+        # One reusable connection per thread, tracked so close() can release them all
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.init_database()
     
     def get_connection(self):
-        """Get database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get this thread's database connection with row factory, opening it on first use
+
+        Using it as a context manager commits or rolls back, it doesn't close it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Only ever used from its own thread; close() may close it from another one
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL mode only needs a full fsync at checkpoints, not on every commit
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
         return conn
     
     def init_database(self):
         """Initialize database with all required tables"""
         with self.get_connection() as conn:
+            # Write-ahead logging (persisted in the database file)
+            conn.execute('PRAGMA journal_mode=WAL')
+            
             # Users table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -121,14 +140,14 @@ class Database:
                 ''', (telegram_id, username, first_name, last_name, referral_code, referred_by))
                 
                 conn.commit()
-                logger.info(f"Added new user: {telegram_id}")
+                logger.info("Added new user: %s", telegram_id)
                 return cursor.lastrowid
         except sqlite3.IntegrityError:
             # User already exists, update last activity
-            self.update_user_activity(telegram_id)
-            return self.get_user_by_telegram_id(telegram_id)['id']
+            user = self.get_and_touch_user(telegram_id)
+            return user['id'] if user else None
         except Exception as e:
-            logger.error(f"Error adding user: {e}")
+            logger.error("Error adding user: %s", e)
             return None
     
     def get_user_by_telegram_id(self, telegram_id: int) -> Optional[Dict]:
@@ -139,8 +158,22 @@ class Database:
                 row = cursor.fetchone()
                 return dict(row) if row else None
         except Exception as e:
-            logger.error(f"Error getting user: {e}")
+            logger.error("Error getting user: %s", e)
+            return None
+    
+    def get_and_touch_user(self, telegram_id: int) -> Optional[Dict]:
+        """Update user's last activity and return the fresh row in one transaction"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    UPDATE users SET last_activity = CURRENT_TIMESTAMP 
+                    WHERE telegram_id = ?
+                ''', (telegram_id,))
+                row = conn.execute('SELECT * FROM users WHERE telegram_id = ?', (telegram_id,)).fetchone()
+        except Exception as e:
+            logger.error("Error touching user: %s", e)
             return None
+        return dict(row) if row else None
     
     def update_user_activity(self, telegram_id: int):
         """Update user's last activity timestamp"""
@@ -152,7 +185,7 @@ class Database:
                 ''', (telegram_id,))
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error updating user activity: {e}")
+            logger.error("Error updating user activity: %s", e)
     
     def add_price_data(self, pair: str, price: float, volume_24h: float = None, 
                       source: str = "icpswap", raw_data: str = None) -> bool:
@@ -166,9 +199,27 @@ class Database:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error adding price data: {e}")
+            logger.error("Error adding price data: %s", e)
             return False
     
+    def add_price_data_batch(self, rows: List[Tuple]) -> int:
+        """Add many price rows in a single transaction
+
+        Each row is (pair, price, volume_24h, source, raw_data).
+        Returns the number of rows stored.
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO price_history (pair, price, volume_24h, source, raw_data)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+                return len(rows)
+        except Exception as e:
+            logger.error("Error adding price data batch: %s", e)
+            return 0
+    
     def get_latest_price(self, pair: str) -> Optional[Dict]:
         """Get latest price for a pair"""
         try:
@@ -182,7 +233,7 @@ class Database:
                 row = cursor.fetchone()
                 return dict(row) if row else None
         except Exception as e:
-            logger.error(f"Error getting latest price: {e}")
+            logger.error("Error getting latest price: %s", e)
             return None
     
     def get_price_change(self, pair: str, hours: int = 24) -> Optional[float]:
@@ -212,9 +263,41 @@ class Database:
                 
                 return ((current_price - old_price) / old_price) * 100
         except Exception as e:
-            logger.error(f"Error calculating price change: {e}")
+            logger.error("Error calculating price change: %s", e)
             return None
     
+    def get_price_changes(self, pairs: List[str], hours: int = 24) -> Dict[str, float]:
+        """Get price change percentages over specified hours for many pairs in one query
+
+        Pairs without data in the window (or with a zero starting price) are left out.
+        """
+        if not pairs:
+            return {}
+        try:
+            with self.get_connection() as conn:
+                placeholders = ', '.join('?' * len(pairs))
+                cursor = conn.execute(f'''
+                    SELECT pair,
+                        (SELECT price FROM price_history old
+                         WHERE old.pair = ph.pair AND old.timestamp >= datetime('now', ?)
+                         ORDER BY old.timestamp ASC LIMIT 1) AS old_price,
+                        (SELECT price FROM price_history cur
+                         WHERE cur.pair = ph.pair
+                         ORDER BY cur.timestamp DESC LIMIT 1) AS current_price
+                    FROM price_history ph
+                    WHERE pair IN ({placeholders})
+                    GROUP BY pair
+                ''', (f'-{hours} hours', *pairs))
+                
+                return {
+                    row['pair']: ((row['current_price'] - row['old_price']) / row['old_price']) * 100
+                    for row in cursor.fetchall()
+                    if row['old_price']
+                }
+        except Exception as e:
+            logger.error("Error calculating price changes: %s", e)
+            return {}
+    
     def add_user_alert(self, user_id: int, pair: str, alert_type: str, threshold: float) -> bool:
         """Add user alert"""
         try:
@@ -226,7 +309,7 @@ class Database:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error adding user alert: {e}")
+            logger.error("Error adding user alert: %s", e)
             return False
     
     def get_user_alerts(self, user_id: int) -> List[Dict]:
@@ -240,7 +323,7 @@ class Database:
                 ''', (user_id,))
                 return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
-            logger.error(f"Error getting user alerts: {e}")
+            logger.error("Error getting user alerts: %s", e)
             return []
     
     def get_all_active_alerts(self) -> List[Dict]:
@@ -255,7 +338,7 @@ class Database:
                 ''')
                 return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
-            logger.error(f"Error getting all active alerts: {e}")
+            logger.error("Error getting all active alerts: %s", e)
             return []
     
     def subscribe_user_to_pair(self, user_id: int, pair: str) -> bool:
@@ -269,7 +352,7 @@ class Database:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error subscribing user to pair: {e}")
+            logger.error("Error subscribing user to pair: %s", e)
             return False
     
     def unsubscribe_user_from_pair(self, user_id: int, pair: str) -> bool:
@@ -284,7 +367,7 @@ class Database:
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Error unsubscribing user from pair: {e}")
+            logger.error("Error unsubscribing user from pair: %s", e)
             return False
     
     def get_user_subscriptions(self, user_id: int) -> List[str]:
@@ -297,7 +380,7 @@ class Database:
                 ''', (user_id,))
                 return [row['pair'] for row in cursor.fetchall()]
         except Exception as e:
-            logger.error(f"Error getting user subscriptions: {e}")
+            logger.error("Error getting user subscriptions: %s", e)
             return []
     
     def log_alert_sent(self, user_id: int, alert_id: int, pair: str, message: str, 
@@ -320,7 +403,7 @@ class Database:
                 
                 conn.commit()
         except Exception as e:
-            logger.error(f"Error logging alert: {e}")
+            logger.error("Error logging alert: %s", e)
     
     def get_user_stats(self, user_id: int) -> Dict:
         """Get user statistics"""
@@ -361,7 +444,7 @@ class Database:
                     'referrals': ref_count
                 }
         except Exception as e:
-            logger.error(f"Error getting user stats: {e}")
+            logger.error("Error getting user stats: %s", e)
             return {}
     
     def cleanup_old_data(self, days: int = 30):
@@ -374,6 +457,23 @@ class Database:
                 '''.format(days))
                 deleted = cursor.rowcount
                 conn.commit()
-                logger.info(f"Cleaned up {deleted} old price records")
+                logger.info("Cleaned up %d old price records", deleted)
+        except Exception as e:
+            logger.error("Error cleaning up old data: %s", e)
+    
+    def close(self):
+        """Fold the write-ahead log back into the database file and close all connections"""
+        try:
+            self.get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
         except Exception as e:
-            logger.error(f"Error cleaning up old data: {e}") 
\ No newline at end of file
+            logger.error("Error closing database: %s", e)
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        # Later calls on any thread open a fresh connection
+        self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error("Error closing database connection: %s", e) 
\ No newline at end of file
@@ -1,16 +1,34 @@
 import requests
+import aiohttp
 import logging
-import json
 import time
 import asyncio
+import bisect
+import threading
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from .waterneuron_client import WaterNeuronClient
 
+# orjson parses the DEX ticker payloads straight from bytes, much faster than the stdlib
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 logger = logging.getLogger(__name__)
 
+# Profit thresholds (% over 6 months) and the recommendation for each band between them
+RECOMMENDATION_TIERS = (5, 10, 15, 20)
+RECOMMENDATIONS = (
+    "❌ POOR - Not recommended",
+    "💡 MODERATE - Decent arbitrage opportunity",
+    "✅ GOOD - Solid arbitrage opportunity",
+    "🔥 GREAT - Strong arbitrage opportunity!",
+    "🚀 EXCELLENT - Very high arbitrage opportunity!"
+)
+
 class NICPArbitrageClient:
-    def __init__(self):
+    def __init__(self, http_session: Optional[aiohttp.ClientSession] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'nICP-Discount-Tracker/1.0.0',
@@ -22,8 +40,12 @@ class NICPArbitrageClient:
         self.icpswap_url = "https://uvevg-iyaaa-aaaak-ac27q-cai.raw.ic0.app/tickers"
         self.kongswap_base_url = "https://api.kongswap.io"
         
-        # Initialize WaterNeuron client
-        self.waterneuron_client = WaterNeuronClient()
+        # Long-lived aiohttp session; created by __aenter__ unless the caller passes one in
+        self.http_session = http_session
+        self._owns_http_session = False
+        
+        # Initialize WaterNeuron client (reuses the shared aiohttp session if there is one)
+        self.waterneuron_client = WaterNeuronClient(session=http_session)
         
         # nICP arbitrage constants (will be updated from WaterNeuron)
         self.DIRECT_STAKING_RATE = 0.9001  # Default: 1 ICP = 0.9001 nICP (from WaterNeuron)
@@ -34,6 +56,15 @@ class NICPArbitrageClient:
         self.ICP_CANISTER = 'ryjl3-tyaaa-aaaaa-aaaba-cai'
         self.NICP_CANISTER = 'buwm7-7yaaa-aaaar-qagva-cai'
         
+        # nICP/ICP in either direction, as (base, target) canister pairs
+        self.NICP_ICP_PAIRS = frozenset({
+            (self.NICP_CANISTER, self.ICP_CANISTER),
+            (self.ICP_CANISTER, self.NICP_CANISTER)
+        })
+        
+        # Per-DEX reachability from the most recent ticker fetch, doubles as the health status
+        self.last_health = {}
+        
         # Cache to avoid too frequent requests
         self.cache = {}
         self.cache_duration = 30  # seconds
@@ -41,6 +72,33 @@ class NICPArbitrageClient:
         # WaterNeuron data cache
         self.waterneuron_cache = {}
         self.waterneuron_cache_duration = 120  # 2 minutes for WaterNeuron data
+        
+        # Persistent event loop backing the synchronous wrappers
+        self._sync_loop = None
+        self._sync_loop_lock = threading.Lock()
+
+    async def __aenter__(self):
+        """Open the shared HTTP session so connections and DNS lookups are reused across polls"""
+        if self.http_session is None:
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ttl_dns_cache=300,
+                    use_dns_cache=True,
+                    limit_per_host=10,
+                    keepalive_timeout=75
+                )
+            )
+            self._owns_http_session = True
+            self.waterneuron_client.session = self.http_session
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the shared HTTP session if this client created it"""
+        if self._owns_http_session:
+            await self.http_session.close()
+            self.http_session = None
+            self._owns_http_session = False
+            self.waterneuron_client.session = None
 
     async def get_waterneuron_exchange_rate(self) -> Optional[Dict]:
         """Get current exchange rate from WaterNeuron protocol using the new API client"""
@@ -116,18 +174,17 @@ class NICPArbitrageClient:
         
         return result
     
+    def _orient_nicp_price(self, base_id: str, last_price: float) -> Tuple[float, str]:
+        """nICP price in ICP and the pair name for a matched ticker, whichever way round it is quoted"""
+        if base_id == self.NICP_CANISTER:
+            # nICP/ICP pair - price is ICP per nICP
+            return last_price, "nICP/ICP"
+        # ICP/nICP pair - price is nICP per ICP, so invert
+        return 1.0 / last_price, "ICP/nICP"
+    
     def _get_arbitrage_recommendation(self, profit_percentage: float) -> str:
         """Get recommendation based on profit percentage"""
-        if profit_percentage >= 20:
-            return "🚀 EXCELLENT - Very high arbitrage opportunity!"
-        elif profit_percentage >= 15:
-            return "🔥 GREAT - Strong arbitrage opportunity!"
-        elif profit_percentage >= 10:
-            return "✅ GOOD - Solid arbitrage opportunity"
-        elif profit_percentage >= 5:
-            return "💡 MODERATE - Decent arbitrage opportunity"
-        else:
-            return "❌ POOR - Not recommended"
+        return RECOMMENDATIONS[bisect.bisect_right(RECOMMENDATION_TIERS, profit_percentage)]
 
     async def get_nicp_arbitrage_data(self) -> Dict:
         """Get nICP arbitrage data from all available DEXes with WaterNeuron integration"""
@@ -159,45 +216,65 @@ class NICPArbitrageClient:
             }
         }
         
-        # Check ICPSwap
-        icpswap_data = await self._get_nicp_from_icpswap(waterneuron_data)
+        # Check ICPSwap and KongSwap concurrently
+        icpswap_data, kongswap_data = await asyncio.gather(
+            self._get_nicp_from_icpswap(waterneuron_data),
+            self._get_nicp_from_kongswap(waterneuron_data)
+        )
         if icpswap_data:
             arbitrage_data['opportunities'].append(icpswap_data)
             arbitrage_data['summary']['total_dexes'] += 1
         
-        # Check KongSwap
-        kongswap_data = await self._get_nicp_from_kongswap(waterneuron_data)
         if kongswap_data:
             arbitrage_data['opportunities'].append(kongswap_data)
             arbitrage_data['summary']['total_dexes'] += 1
         
         # Find best opportunity
-        viable_opportunities = [opp for opp in arbitrage_data['opportunities'] if opp.get('arbitrage', {}).get('viable', False)]
+        self._rank_opportunities(arbitrage_data)
+        
+        # Cache the result
+        self.cache[cache_key] = (arbitrage_data, current_time)
+        
+        return arbitrage_data
+
+    def _rank_opportunities(self, arbitrage_data: Dict):
+        """Store viable opportunities sorted by profit, plus the best one and summary counts
+
+        Done once per fetch so every consumer of the (cached) data can render the
+        ranked list without filtering and sorting it again.
+        """
+        viable_opportunities = sorted(
+            (opp for opp in arbitrage_data['opportunities'] if opp.get('arbitrage', {}).get('viable', False)),
+            key=lambda x: x['arbitrage']['profit_percentage_6m'],
+            reverse=True
+        )
+        arbitrage_data['viable_opportunities'] = viable_opportunities
         arbitrage_data['summary']['viable_opportunities'] = len(viable_opportunities)
         
         if viable_opportunities:
-            best_opp = max(viable_opportunities, key=lambda x: x['arbitrage']['profit_percentage_6m'])
+            best_opp = viable_opportunities[0]
             arbitrage_data['best_opportunity'] = best_opp
             arbitrage_data['summary']['best_profit_6m'] = best_opp['arbitrage']['profit_percentage_6m']
             arbitrage_data['summary']['best_annualized_return'] = best_opp['arbitrage']['annualized_return']
-        
-        # Cache the result
-        self.cache[cache_key] = (arbitrage_data, current_time)
-        
-        return arbitrage_data
 
-    def get_nicp_arbitrage_data_sync(self) -> Dict:
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the background event loop used by the sync wrappers, starting it on first use"""
+        with self._sync_loop_lock:
+            if self._sync_loop is None:
+                self._sync_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._sync_loop.run_forever,
+                    name="nicp-arbitrage-loop",
+                    daemon=True
+                ).start()
+            return self._sync_loop
+
+    def get_nicp_arbitrage_data_sync(self, timeout: float = 30) -> Dict:
         """Synchronous wrapper for get_nicp_arbitrage_data"""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If we're already in an async context, create a new task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, self.get_nicp_arbitrage_data())
-                    return future.result()
-            else:
-                return loop.run_until_complete(self.get_nicp_arbitrage_data())
+            # Reuse one long-lived loop instead of creating a new one per call
+            future = asyncio.run_coroutine_threadsafe(self.get_nicp_arbitrage_data(), self._get_sync_loop())
+            return future.result(timeout=timeout)
         except Exception as e:
             logger.error(f"Error in sync wrapper: {e}")
             # Fallback to old synchronous method
@@ -237,24 +314,20 @@ class NICPArbitrageClient:
             arbitrage_data['summary']['total_dexes'] += 1
         
         # Find best opportunity
-        viable_opportunities = [opp for opp in arbitrage_data['opportunities'] if opp.get('arbitrage', {}).get('viable', False)]
-        arbitrage_data['summary']['viable_opportunities'] = len(viable_opportunities)
-        
-        if viable_opportunities:
-            best_opp = max(viable_opportunities, key=lambda x: x['arbitrage']['profit_percentage_6m'])
-            arbitrage_data['best_opportunity'] = best_opp
-            arbitrage_data['summary']['best_profit_6m'] = best_opp['arbitrage']['profit_percentage_6m']
-            arbitrage_data['summary']['best_annualized_return'] = best_opp['arbitrage']['annualized_return']
+        self._rank_opportunities(arbitrage_data)
         
         return arbitrage_data
 
     async def _get_nicp_from_icpswap(self, waterneuron_data: Optional[Dict] = None) -> Optional[Dict]:
         """Get nICP data from ICPSwap (async version)"""
-        return self._get_nicp_from_icpswap_sync(waterneuron_data)
+        # The blocking requests call runs in the default executor so the event loop stays free
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_nicp_from_icpswap_sync, waterneuron_data)
 
     async def _get_nicp_from_kongswap(self, waterneuron_data: Optional[Dict] = None) -> Optional[Dict]:
         """Get nICP data from KongSwap (async version)"""
-        return self._get_nicp_from_kongswap_sync(waterneuron_data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._get_nicp_from_kongswap_sync, waterneuron_data)
 
     def _get_nicp_from_kongswap_sync(self, waterneuron_data: Optional[Dict] = None) -> Optional[Dict]:
         """Get nICP data from KongSwap"""
@@ -262,7 +335,8 @@ class NICPArbitrageClient:
             ticker_url = f"{self.kongswap_base_url}/api/coingecko/tickers"
             response = self.session.get(ticker_url, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
+            self.last_health['KongSwap'] = True
             
             # Look for nICP/ICP pairs
             for ticker in data:
@@ -270,22 +344,14 @@ class NICPArbitrageClient:
                 target_id = ticker.get('target_currency', '') or ticker.get('target_id', '')
                 
                 # Check for nICP/ICP pair in either direction
-                if ((base_id == self.NICP_CANISTER and target_id == self.ICP_CANISTER) or
-                    (base_id == self.ICP_CANISTER and target_id == self.NICP_CANISTER)):
+                if (base_id, target_id) in self.NICP_ICP_PAIRS:
                     
                     last_price = float(ticker.get('last_price', 0))
                     if last_price <= 0:
                         continue
                     
                     # Determine nICP price in ICP terms
-                    if base_id == self.NICP_CANISTER:
-                        # nICP/ICP pair - price is ICP per nICP
-                        nicp_price_in_icp = last_price
-                        pair_name = "nICP/ICP"
-                    else:
-                        # ICP/nICP pair - price is nICP per ICP, so invert
-                        nicp_price_in_icp = 1.0 / last_price
-                        pair_name = "ICP/nICP"
+                    nicp_price_in_icp, pair_name = self._orient_nicp_price(base_id, last_price)
                     
                     # Calculate arbitrage with WaterNeuron data
                     arbitrage = self.calculate_arbitrage_opportunity(nicp_price_in_icp, waterneuron_data)
@@ -315,6 +381,7 @@ class NICPArbitrageClient:
                     
         except Exception as e:
             logger.error(f"Error fetching nICP data from KongSwap: {e}")
+            self.last_health['KongSwap'] = False
         
         return None
 
@@ -323,7 +390,8 @@ class NICPArbitrageClient:
         try:
             response = self.session.get(self.icpswap_url, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
+            self.last_health['ICPSwap'] = True
             
             # Look for nICP/ICP pairs
             for item in data:
@@ -331,22 +399,14 @@ class NICPArbitrageClient:
                 target_id = item.get('target_id', '')
                 
                 # Check for nICP/ICP pair in either direction
-                if ((base_id == self.NICP_CANISTER and target_id == self.ICP_CANISTER) or
-                    (base_id == self.ICP_CANISTER and target_id == self.NICP_CANISTER)):
+                if (base_id, target_id) in self.NICP_ICP_PAIRS:
                     
                     last_price = float(item.get('last_price', 0))
                     if last_price <= 0:
                         continue
                     
                     # Determine nICP price in ICP terms
-                    if base_id == self.NICP_CANISTER:
-                        # nICP/ICP pair - price is ICP per nICP
-                        nicp_price_in_icp = last_price
-                        pair_name = "nICP/ICP"
-                    else:
-                        # ICP/nICP pair - price is nICP per ICP, so invert
-                        nicp_price_in_icp = 1.0 / last_price
-                        pair_name = "ICP/nICP"
+                    nicp_price_in_icp, pair_name = self._orient_nicp_price(base_id, last_price)
                     
                     # Calculate arbitrage with WaterNeuron data
                     arbitrage = self.calculate_arbitrage_opportunity(nicp_price_in_icp, waterneuron_data)
@@ -370,6 +430,7 @@ class NICPArbitrageClient:
                     
         except Exception as e:
             logger.error(f"Error fetching nICP data from ICPSwap: {e}")
+            self.last_health['ICPSwap'] = False
         
         return None
 
@@ -380,7 +441,7 @@ class NICPArbitrageClient:
             url = "https://api.coingecko.com/api/v3/simple/price?ids=internet-computer&vs_currencies=usd"
             response = self.session.get(url, timeout=5)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             return float(data.get('internet-computer', {}).get('usd', 4.80))
         except Exception as e:
             logger.warning(f"Could not fetch ICP price from CoinGecko: {e}")
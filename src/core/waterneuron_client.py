@@ -10,10 +10,18 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
+# orjson's JSONDecodeError subclasses json.JSONDecodeError, so the handler below covers both
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 logger = logging.getLogger(__name__)
 
 class WaterNeuronClient:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # Optional long-lived session owned by the caller; a temporary one is used otherwise
+        self.session = session
         self.api_url = "https://wtn.ic.app/api/nicp"
         self.headers = {
             'User-Agent': 'nICP-Discount-Tracker/1.0.0',
@@ -39,31 +47,12 @@ class WaterNeuronClient:
         try:
             logger.info("🌊 Fetching exchange rate from WaterNeuron API...")
             
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10),
-                headers=self.headers
-            ) as session:
-                
-                async with session.get(self.api_url) as response:
-                    if response.status == 200:
-                        # Parse JSON data (response is text/plain but contains JSON)
-                        text_data = await response.text()
-                        data = json.loads(text_data)
-                        
-                        # Extract the exchange rate data
-                        exchange_rate_data = self._parse_api_response(data)
-                        
-                        if exchange_rate_data['success']:
-                            # Cache the result
-                            self.cache[cache_key] = (exchange_rate_data, datetime.now())
-                            logger.info(f"✅ WaterNeuron exchange rate: nICP/ICP = {exchange_rate_data['nicp_to_icp_rate']:.4f}")
-                            return exchange_rate_data
-                        else:
-                            logger.warning("❌ Failed to parse WaterNeuron API response")
-                            return self._get_fallback_response("Failed to parse API response")
-                    else:
-                        logger.warning(f"❌ WaterNeuron API returned status {response.status}")
-                        return self._get_fallback_response(f"API returned status {response.status}")
+            timeout = aiohttp.ClientTimeout(total=10)
+            if self.session is not None:
+                return await self._fetch_exchange_rate(self.session, timeout)
+            
+            async with aiohttp.ClientSession() as session:
+                return await self._fetch_exchange_rate(session, timeout)
                         
         except asyncio.TimeoutError:
             logger.warning("⏰ WaterNeuron API request timed out")
@@ -75,6 +64,28 @@ class WaterNeuronClient:
             logger.warning(f"❌ Error fetching WaterNeuron exchange rate: {e}")
             return self._get_fallback_response(str(e))
     
+    async def _fetch_exchange_rate(self, session: aiohttp.ClientSession, timeout: aiohttp.ClientTimeout) -> Dict[str, Any]:
+        """Fetch and parse the exchange rate using the given session"""
+        async with session.get(self.api_url, headers=self.headers, timeout=timeout) as response:
+            if response.status == 200:
+                # Parse JSON data (response is text/plain but contains JSON)
+                data = json_loads(await response.read())
+                
+                # Extract the exchange rate data
+                exchange_rate_data = self._parse_api_response(data)
+                
+                if exchange_rate_data['success']:
+                    # Cache the result
+                    self.cache["exchange_rate"] = (exchange_rate_data, datetime.now())
+                    logger.info(f"✅ WaterNeuron exchange rate: nICP/ICP = {exchange_rate_data['nicp_to_icp_rate']:.4f}")
+                    return exchange_rate_data
+                else:
+                    logger.warning("❌ Failed to parse WaterNeuron API response")
+                    return self._get_fallback_response("Failed to parse API response")
+            else:
+                logger.warning(f"❌ WaterNeuron API returned status {response.status}")
+                return self._get_fallback_response(f"API returned status {response.status}")
+
     def _parse_api_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse the WaterNeuron API response and calculate exchange rates
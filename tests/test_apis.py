@@ -174,7 +174,6 @@ def test_all_imports():
     
     required_modules = [
         'requests',
-        'schedule',
         'dotenv',
         'aiohttp',
         'sqlite3',
@@ -45,21 +45,16 @@ def simulate_data_collection():
     price_data = api_client.get_icp_prices()
     
     if price_data:
-        stored_count = 0
-        for pair, data in price_data.items():
-            success = db.add_price_data(
-                pair=pair,
-                price=data['price'],
-                volume_24h=data.get('volume_24h'),
-                source=data.get('source', 'unknown'),
-                raw_data=data.get('raw_data')
-            )
-            
-            if success:
-                stored_count += 1
-                # Show first few
-                if stored_count <= 3:
-                    print(f"   ✅ Stored {pair}: ${data['price']:.6f}")
+        rows = [
+            (pair, data['price'], data.get('volume_24h'), data.get('source', 'unknown'), data.get('raw_data'))
+            for pair, data in price_data.items()
+        ]
+        stored_count = db.add_price_data_batch(rows)
+        
+        # Show first few
+        if stored_count:
+            for pair, data in list(price_data.items())[:3]:
+                print(f"   ✅ Stored {pair}: ${data['price']:.6f}")
         
         print(f"📦 Stored price data for {stored_count} pairs")
         
@@ -183,7 +178,7 @@ def show_system_overview():
         ("🌐 API Client", "ICPSwap", "Real-time price data"),
         ("⚡ Alert System", "Background", "Price monitoring & notifications"),
         ("🤖 Telegram Bot", "python-telegram-bot", "User interface"),
-        ("⏰ Scheduler", "schedule", "Automated tasks"),
+        ("⏰ Scheduler", "asyncio", "Automated tasks"),
         ("📝 Logging", "Python logging", "System monitoring")
     ]
     